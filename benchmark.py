@@ -0,0 +1,338 @@
+# Benchmarks stream_read_ods on synthetic ODS files of various shapes, outputting JSON
+#
+#   python benchmark.py --output results.json
+#   python benchmark.py --baseline results.json
+#
+# Each benchmark is run in its own subprocess so its peak RSS is not affected by the others or by
+# generating the ODS files. If --baseline is passed, the exit code is 1 if the rows per second of
+# any benchmark are lower than the baseline's by more than --tolerance
+
+from datetime import date, datetime
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from lxml import etree
+from stream_unzip import stream_unzip
+from stream_write_ods import stream_write_ods
+from stream_zip import NO_COMPRESSION_32, ZIP_32, stream_zip
+
+from stream_read_ods import stream_read_ods, simple_table
+
+
+def tall(scale):
+    def rows():
+        for i in range(0, int(200000 * scale)):
+            yield f'Row {i}', i, i / 7, date(2021, 1, 1 + i % 28), i % 2 == 0
+
+    yield 'Tall', ('string', 'integer', 'float', 'date', 'boolean'), rows()
+
+
+def wide(scale):
+    def rows():
+        for i in range(0, int(2000 * scale)):
+            yield tuple(i + c for c in range(0, 500))
+
+    yield 'Wide', tuple(f'col_{c}' for c in range(0, 500)), rows()
+
+
+def string_heavy(scale):
+    def rows():
+        for i in range(0, int(100000 * scale)):
+            yield tuple(f'A longer string value in row {i} and column {c}' for c in range(0, 5))
+
+    yield 'Strings', tuple(f'col_{c}' for c in range(0, 5)), rows()
+
+
+def numeric_heavy(scale):
+    def rows():
+        for i in range(0, int(100000 * scale)):
+            yield tuple(i * 1.5 + c for c in range(0, 10))
+
+    yield 'Numbers', tuple(f'col_{c}' for c in range(0, 10)), rows()
+
+
+def many_sheets(scale):
+    def rows(s):
+        for i in range(0, 100):
+            yield f'Sheet {s} row {i}', i, date(2021, 1, 1), datetime(2021, 1, 1, 1, 2, 3), True
+
+    for s in range(0, int(500 * scale)):
+        yield f'Sheet {s}', ('string', 'integer', 'date', 'datetime', 'boolean'), rows(s)
+
+
+def content_xml_ods(get_rows_xml):
+    # stream_write_ods doesn't output merged or repeated cells, so these are constructed directly
+    def unzipped_files():
+        yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<office:body><office:spreadsheet><table:table table:name="Sheet1">',
+            *get_rows_xml(),
+            b'</table:table></office:spreadsheet></office:body></office:document-content>',
+        )
+
+    return stream_zip(unzipped_files())
+
+
+def merged(scale):
+    # Blocks of 50 rows, each with a header cell merged across 4 columns, and a cell merged down
+    # all 50 rows
+    def get_rows_xml():
+        for i in range(0, int(2000 * scale)):
+            yield \
+                b'<table:table-row>' \
+                b'<table:table-cell office:value-type="string" table:number-columns-spanned="4"><text:p>Header %d</text:p></table:table-cell>' \
+                b'<table:covered-table-cell table:number-columns-repeated="3"/>' \
+                b'<table:table-cell office:value-type="string" table:number-rows-spanned="50"><text:p>Group %d</text:p></table:table-cell>' \
+                b'</table:table-row>' % (i, i)
+            for j in range(1, 50):
+                yield \
+                    b'<table:table-row>' \
+                    b'<table:table-cell office:value-type="float" office:value="%d"/>' \
+                    b'<table:table-cell office:value-type="float" office:value="%d.5"/>' \
+                    b'<table:table-cell office:value-type="date" office:date-value="2021-01-02"/>' \
+                    b'<table:table-cell office:value-type="boolean" office:boolean-value="true"/>' \
+                    b'<table:covered-table-cell/>' \
+                    b'</table:table-row>' % (j, j)
+
+    return content_xml_ods(get_rows_xml)
+
+
+def excel_blanks(scale):
+    # Like Excel's output, each row padded by a repeated empty cell to 16384 columns, and the sheet
+    # padded by a repeated empty row to 1048576 rows
+    num_rows = int(100000 * scale)
+
+    def get_rows_xml():
+        for i in range(0, num_rows):
+            yield \
+                b'<table:table-row>' \
+                b'<table:table-cell office:value-type="string"><text:p>Row %d</text:p></table:table-cell>' \
+                b'<table:table-cell office:value-type="float" office:value="%d"/>' \
+                b'<table:table-cell table:number-columns-repeated="2"/>' \
+                b'<table:table-cell office:value-type="boolean" office:boolean-value="false"/>' \
+                b'<table:table-cell table:number-columns-repeated="16379"/>' \
+                b'</table:table-row>' % (i, i)
+        yield \
+            b'<table:table-row table:number-rows-repeated="%d">' \
+            b'<table:table-cell table:number-columns-repeated="16384"/>' \
+            b'</table:table-row>' % (1048576 - num_rows)
+
+    return content_xml_ods(get_rows_xml)
+
+
+shapes = {
+    'tall': lambda scale: stream_write_ods(tall(scale)),
+    'wide': lambda scale: stream_write_ods(wide(scale)),
+    'string_heavy': lambda scale: stream_write_ods(string_heavy(scale)),
+    'numeric_heavy': lambda scale: stream_write_ods(numeric_heavy(scale)),
+    'many_sheets': lambda scale: stream_write_ods(many_sheets(scale)),
+    'merged': merged,
+    'excel_blanks': excel_blanks,
+}
+
+# Pairs of shape and variant, where the variant is the function used and any arguments
+benchmarks = [
+    *((shape, 'stream_read_ods') for shape in shapes),
+    *((shape, 'simple_table') for shape in shapes),
+    ('numeric_heavy', 'stream_read_ods:numeric=float'),
+    ('numeric_heavy', 'stream_read_ods:numeric=int_if_integral'),
+    *((shape, 'stream_read_ods:engine=target') for shape in shapes),
+    *((shape, 'stream_read_ods:prefetch_bytes=1048576') for shape in shapes),
+    # Skipping sheets should cost little more than decompressing and tokenising them
+    *((shape, variant) for shape in ('tall', 'many_sheets') for variant in ('tokenise', 'stream_read_ods:sheets=', 'stream_read_ods:sheets=0')),
+]
+
+
+def run_one(path, variant):
+    # Variants are function:key=value,key=value, where sheets is a |-separated list of sheet names
+    # and/or indexes, and the tokenise function only decompresses and tokenises content.xml
+    function, _, kwargs_str = variant.partition(':')
+    kwargs = dict(kwarg.split('=') for kwarg in kwargs_str.split(',')) if kwargs_str else {}
+    kwargs = {
+        key:
+            [int(sheet) if sheet.isdigit() else sheet for sheet in value.split('|') if sheet] if key == 'sheets' else
+            int(value) if value.isdigit() else
+            value
+        for key, value in kwargs.items()
+    }
+
+    def ods_chunks():
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                yield chunk
+
+    num_rows = 0
+    num_cells = 0
+    start = time.perf_counter()
+    if function == 'tokenise':
+        tokenise(ods_chunks())
+    else:
+        for sheet_name, sheet_rows in stream_read_ods(ods_chunks(), **kwargs):
+            if function == 'simple_table':
+                columns, sheet_rows = simple_table(sheet_rows)
+            for row in sheet_rows:
+                num_rows += 1
+                num_cells += len(row)
+    seconds = time.perf_counter() - start
+
+    return {
+        'seconds': seconds,
+        'rows': num_rows,
+        'cells': num_cells,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def tokenise(ods_chunks):
+    for name, _, chunks in stream_unzip(ods_chunks):
+        if name != b'content.xml':
+            for chunk in chunks:
+                pass
+            continue
+        parser = etree.XMLPullParser(events=('end',), resolve_entities=False)
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                element.clear()
+        parser.close()
+
+
+def peak_rss_mb():
+    # On Linux ru_maxrss is carried over from the parent through fork and exec, so would be at
+    # least the parent's peak, but VmHWM is reset on exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def content_xml_size(path):
+    def ods_chunks():
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                yield chunk
+
+    size = 0
+    for name, _, chunks in stream_unzip(ods_chunks()):
+        for chunk in chunks:
+            if name == b'content.xml':
+                size += len(chunk)
+    return size
+
+
+def run_all(scale, repeats, only):
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for shape, get_ods_chunks in shapes.items():
+            variants = [variant for s, variant in benchmarks if s == shape and (not only or shape in only)]
+            if not variants:
+                continue
+
+            path = os.path.join(directory, f'{shape}.ods')
+            with open(path, 'wb') as f:
+                for chunk in get_ods_chunks(scale):
+                    f.write(chunk)
+            content_xml_mb = content_xml_size(path) / (1024 * 1024)
+
+            for variant in variants:
+                # The fastest of the repeats is the least affected by anything else on the machine
+                runs = [
+                    json.loads(subprocess.run(
+                        [sys.executable, __file__, '--run-one', path, variant],
+                        check=True, stdout=subprocess.PIPE,
+                    ).stdout)
+                    for _ in range(0, repeats)
+                ]
+                run = min(runs, key=lambda run: run['seconds'])
+                result = {
+                    'name': f'{shape}:{variant}',
+                    'seconds': run['seconds'],
+                    'rows': run['rows'],
+                    'cells': run['cells'],
+                    'content_xml_mb': content_xml_mb,
+                    'rows_per_sec': run['rows'] / run['seconds'],
+                    'cells_per_sec': run['cells'] / run['seconds'],
+                    'content_xml_mb_per_sec': content_xml_mb / run['seconds'],
+                    'peak_rss_mb': max(run['peak_rss_mb'] for run in runs),
+                }
+                print(
+                    f"{result['name']:<50} {result['rows_per_sec']:>12,.0f} rows/s {result['cells_per_sec']:>12,.0f} cells/s "
+                    f"{result['content_xml_mb_per_sec']:>8.2f} MB/s {result['peak_rss_mb']:>8.1f} MB peak RSS",
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    # Compared by MB of content.xml per second rather than rows per second, since some variants,
+    # such as those that skip sheets, return no rows
+    baseline_by_name = {result['name']: result for result in baseline['results']}
+    return [
+        (result['name'], baseline_by_name[result['name']]['content_xml_mb_per_sec'], result['content_xml_mb_per_sec'])
+        for result in results
+        if result['name'] in baseline_by_name
+        and result['content_xml_mb_per_sec'] < baseline_by_name[result['name']]['content_xml_mb_per_sec'] * (1 - tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark stream_read_ods on synthetic ODS files')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the size of each ODS file')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of times each benchmark is run')
+    parser.add_argument('--only', nargs='*', choices=list(shapes), help='Only run benchmarks of these shapes')
+    parser.add_argument('--output', help='File to write the JSON results to, rather than stdout')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Fraction slower than the baseline that is not a regression')
+    parser.add_argument('--run-one', nargs=2, metavar=('PATH', 'VARIANT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(*args.run_one)))
+        return
+
+    results = run_all(args.scale, args.repeats, args.only)
+    output = json.dumps({
+        'python': sys.version,
+        'scale': args.scale,
+        'results': results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.tolerance)
+        for name, baseline_mb_per_sec, mb_per_sec in slower:
+            print(f'Regression in {name}: {mb_per_sec:.2f} MB/s, baseline {baseline_mb_per_sec:.2f} MB/s', file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,45 +1,148 @@
-from collections import namedtuple
+from bisect import bisect_right
+from collections import Counter, deque, namedtuple
+from collections.abc import Sequence
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache, partial
+from itertools import groupby, islice, repeat
+from struct import Struct
+from time import perf_counter
+import asyncio
+import gzip
+import hashlib
+import importlib
+import importlib.util
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
 import re
+import tempfile
+import threading
+import weakref
+import zlib
 
 from lxml import etree
-from stream_unzip import UnzipValueError, stream_unzip
+from stream_unzip import (
+    CompressedSizeIntegrityError,
+    CRC32IntegrityError,
+    DeflateError,
+    NotStreamUnzippable,
+    TruncatedDataError,
+    UncompressedSizeIntegrityError,
+    UnexpectedSignatureError,
+    UnsupportedCompressionTypeError,
+    UnsupportedFlagsError,
+    UnzipValueError,
+    stream_unzip,
+)
+
+
+def stream_read_ods(ods_chunks, max_string_length=65536, max_columns=65536, max_split_cells=65536, chunk_size=65536, sheets=None, usecols=None, skip_rows=0, max_rows=None, numeric='decimal', cell_cache=None, column_runs=False, row_runs=False, max_repeated_rows=1048576, stats=None, stop_after_content_xml=False, engine='tree', conversion_cache=None, prefetch_bytes=0, lazy=False, string_overflow='raise', spool=False, spool_max_memory=16777216, spool_max_disk=1073741824, intern_strings=0):
+    sheets = sheets if sheets is None or callable(sheets) else tuple(sheets)
+    usecols = tuple(usecols) if usecols is not None else None
+
+    def read(ods_chunks):
+        return _stream_read_ods(ods_chunks, max_string_length, max_columns, max_split_cells, chunk_size, sheets=sheets, usecols=usecols, skip_rows=skip_rows, max_rows=max_rows, numeric=numeric, cell_cache=cell_cache, column_runs=column_runs, row_runs=row_runs, max_repeated_rows=max_repeated_rows, stats=stats, stop_after_content_xml=stop_after_content_xml, engine=engine, prefetch_bytes=prefetch_bytes, lazy=lazy, string_overflow=string_overflow, spool=spool, spool_max_memory=spool_max_memory, spool_max_disk=spool_max_disk, intern_strings=intern_strings)
+
+    if conversion_cache is not None and spool:
+        raise ValueError('conversion_cache cannot be combined with spool')
+    if conversion_cache is not None and lazy:
+        raise ValueError('conversion_cache cannot be combined with lazy')
+
+    # The rows from a function to select sheets can't be cached, since the function can't be part
+    # of the key of the entry. The order of sheets doesn't affect the rows, and for a set depends on
+    # the hash seed of the process, so it's sorted to have the same key in every process
+    return \
+        read(ods_chunks) if conversion_cache is None or callable(sheets) else \
+        conversion_cache._read(ods_chunks, chunk_size, (max_string_length, max_columns, max_split_cells, sheets if sheets is None else tuple(sorted(sheets, key=repr)), usecols, skip_rows, max_rows, numeric, column_runs, row_runs, max_repeated_rows, string_overflow), read)
+
+
+def stream_read_ods_random_access(source, size=None, max_string_length=65536, max_columns=65536, max_split_cells=65536, chunk_size=65536, sheets=None, usecols=None, skip_rows=0, max_rows=None, numeric='decimal', cell_cache=None, column_runs=False, row_runs=False, max_repeated_rows=1048576, stats=None, engine='tree', prefetch_bytes=0, lazy=False, string_overflow='raise', spool=False, spool_max_memory=16777216, spool_max_disk=1073741824, intern_strings=0):
+    # Like stream_read_ods, but rather than an iterable of bytes, the source is either a seekable
+    # file-like object such as an open file or mmap, or a function that takes an offset and length
+    # and returns those bytes of the ODS file, in which case size must be passed. The ZIP central
+    # directory is used to jump to content.xml, so no other members are read or decompressed
+    if callable(source):
+        if size is None:
+            raise ValueError('size must be passed if source is a function')
+        read_range = source
+    else:
+        if size is None:
+            source.seek(0, os.SEEK_END)
+            size = source.tell()
+        read_range = _file_read_range(source)
+
+    if stats is not None:
+        stats.ods_size = stats.ods_size if stats.ods_size is not None else size
+        read_range = stats._timed_function(read_range, 'source')
+        read_range = stats._counted_read_range(read_range)
+
+    content_xml_chunks = _random_access_content_xml(read_range, size, chunk_size)
+
+    return _read_content_xml(content_xml_chunks, max_string_length, max_columns, max_split_cells, sheets=sheets, usecols=usecols, skip_rows=skip_rows, max_rows=max_rows, numeric=numeric, cell_cache=cell_cache, column_runs=column_runs, row_runs=row_runs, max_repeated_rows=max_repeated_rows, stats=stats, engine=engine, prefetch_bytes=prefetch_bytes, lazy=lazy, string_overflow=string_overflow, spool=spool, spool_max_memory=spool_max_memory, spool_max_disk=spool_max_disk, intern_strings=intern_strings)
+
+
+def stream_read_ods_columnar(ods_chunks, batch_size=65536, batch_format=None, max_string_length=65536, max_columns=65536, max_split_cells=65536, chunk_size=65536, sheets=None, usecols=None, skip_rows=0, max_rows=None, stats=None, intern_strings=0, dictionary_encode=False, max_dictionary_size=4096):
+    # Like stream_read_ods, but rather than rows, each sheet has an iterable of batches of up to
+    # batch_size rows, where each batch is column-oriented, with the same schema for all batches
+    # of a sheet. If dictionary_encode is True, columns of only strings with at most
+    # max_dictionary_size distinct strings in the first batch of a sheet are dictionary encoded
+
+    batch_format = \
+        batch_format if batch_format is not None else \
+        'arrow' if importlib.util.find_spec('pyarrow') is not None else \
+        'numpy'
+    sheet_batch_converter = _columnar_batch_converter(batch_format, dictionary_encode, max_dictionary_size)
+
+    def batches(rows):
+        to_batch = sheet_batch_converter()
+        while True:
+            rows_in_batch = list(islice(rows, batch_size))
+            if not rows_in_batch:
+                break
+            yield to_batch(rows_in_batch)
 
+    for sheet_name, rows in _stream_read_ods(ods_chunks, max_string_length, max_columns, max_split_cells, chunk_size, raw_values=True, sheets=sheets, usecols=usecols, skip_rows=skip_rows, max_rows=max_rows, stats=stats, intern_strings=intern_strings):
+        sheet_batches = batches(rows)
+        yield sheet_name, sheet_batches
+        for _ in sheet_batches:
+            raise UnfinishedIterationError()
 
-def stream_read_ods(ods_chunks, max_string_length=65536, max_columns=65536, max_split_cells=65536, chunk_size=65536):
 
-    # lxml iterparse takes a file-like object, but stream_read_ods accepts an iterable
-    # so we have to do some low-ish level faffing to convert from one to the other
-    def to_file_like_obj(bytes_iter):
-        chunk = b''
-        offset = 0
-        it = iter(bytes_iter)
+def scan_ods(ods_chunks, chunk_size=65536, sheets=None, max_bytes=None, engine='tree'):
+    # Yields a SheetScan for each sheet, counting its rows, columns and merged cells from only the
+    # repeat and span attributes, without parsing any values. If max_bytes is passed, no more
+    # chunks are taken once that many bytes have been read, and the sheet being scanned at that
+    # point is yielded with what has been counted so far, and complete set to False
+    num_bytes = 0
 
-        def up_to_iter(size):
-            nonlocal chunk, offset
+    def budgeted(chunks):
+        nonlocal num_bytes
+        it = iter(chunks)
+        while True:
+            if max_bytes is not None and num_bytes >= max_bytes:
+                raise _ByteBudgetReached()
+            try:
+                chunk = next(it)
+            except StopIteration:
+                return
+            num_bytes += len(chunk)
+            yield chunk
 
-            while size:
-                if offset == len(chunk):
-                    try:
-                        chunk = next(it)
-                    except StopIteration:
-                        break
-                    else:
-                        offset = 0
-                to_yield = min(size, len(chunk) - offset)
-                offset = offset + to_yield
-                size -= to_yield
-                yield chunk[offset - to_yield:offset]
+    try:
+        yield from _stream_read_ods(budgeted(ods_chunks), 65536, 65536, 65536, chunk_size, sheets=sheets, engine=engine, scan=True)
+    except _ByteBudgetReached:
+        pass
+
+
+class _ByteBudgetReached(Exception):
+    pass
 
-        class FileLikeObj:
-            def read(self, size=-1):
-                return b''.join(up_to_iter(float('inf') if size is None or size < 0 else size))
 
-        return FileLikeObj()
+def _stream_read_ods(ods_chunks, max_string_length, max_columns, max_split_cells, chunk_size, raw_values=False, sheets=None, usecols=None, skip_rows=0, max_rows=None, numeric='decimal', cell_cache=None, column_runs=False, row_runs=False, max_repeated_rows=1048576, stats=None, stop_after_content_xml=False, engine='tree', scan=False, prefetch_bytes=0, lazy=False, string_overflow='raise', spool=False, spool_max_memory=16777216, spool_max_disk=1073741824, intern_strings=0):
 
     def validate_mimetype_and_get_content(unzipped_files):
-        correct_mimetype = b'application/vnd.oasis.opendocument.spreadsheet'
         found_content_xml = False
 
         for i, (name, size, chunks) in enumerate(unzipped_files):
@@ -49,12 +152,12 @@ def stream_read_ods(ods_chunks, max_string_length=65536, max_columns=65536, max_
             if i == 0 and name == b'mimetype':
                 mimetype = b''
                 chunks_it = iter(chunks)
-                while len(mimetype) < len(correct_mimetype):
+                while len(mimetype) < len(_correct_mimetype):
                     try:
                         mimetype += next(chunks_it)
                     except StopIteration:
                         break
-                if mimetype != correct_mimetype:
+                if mimetype != _correct_mimetype:
                     raise IncorrectMIMETypeError(mimetype.decode("utf-8"))
 
             if name != b'content.xml':
@@ -65,270 +168,1765 @@ def stream_read_ods(ods_chunks, max_string_length=65536, max_columns=65536, max_
             found_content_xml = True
             yield from chunks
 
+            # The rest of the ZIP file is not read, so its structure is not validated
+            if stop_after_content_xml:
+                return
+
         if not found_content_xml:
             raise MissingContentXMLError()
 
-    def get_sheets_and_rows(parsed_xml):
+    source_chunks = ods_chunks
+    if stats is not None:
+        ods_chunks = stats._timed(ods_chunks, 'source', stats._count_compressed)
+
+    unzipped_member_files = stream_unzip(ods_chunks, chunk_size=chunk_size)
+    content_xml_chunks = validate_mimetype_and_get_content(unzipped_member_files)
+
+    yield from _read_content_xml(content_xml_chunks, max_string_length, max_columns, max_split_cells, raw_values=raw_values, sheets=sheets, usecols=usecols, skip_rows=skip_rows, max_rows=max_rows, numeric=numeric, cell_cache=cell_cache, column_runs=column_runs, row_runs=row_runs, max_repeated_rows=max_repeated_rows, stats=stats, engine=engine, scan=scan, prefetch_bytes=prefetch_bytes, lazy=lazy, string_overflow=string_overflow, spool=spool, spool_max_memory=spool_max_memory, spool_max_disk=spool_max_disk, intern_strings=intern_strings)
+    unzipped_member_files.close()
+
+    # So for example an HTTP response is closed rather than left to download the rest of the file
+    if stop_after_content_xml and hasattr(source_chunks, 'close'):
+        source_chunks.close()
 
-        # Thanks to https://stackoverflow.com/a/2765366/1319998
-        time_regex = re.compile(r'(?P<sign>-?)P(?:(?P<years>\d+)Y)?(?:(?P<months>\d+)M)?(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>([0-9]*[.])?[0-9]+)S)?)?')
-        ns_table = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
-        ns_text = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
-        ns_office = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
 
-        def _next(it):
+def _file_read_range(f):
+    def read_range(offset, length):
+        f.seek(offset)
+        chunks = []
+        num_read = 0
+        while num_read < length:
+            chunk = f.read(length - num_read)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            num_read += len(chunk)
+        return b''.join(chunks)
+
+    return read_range
+
+
+# Shared by the readers of ZIP files
+_correct_mimetype = b'application/vnd.oasis.opendocument.spreadsheet'
+_local_file_header_signature = b'PK\x03\x04'
+_local_file_header_struct = Struct('<HHHHHIIIHH')
+_central_directory_signature = b'PK\x01\x02'
+_end_of_central_directory_signature = b'PK\x05\x06'
+_zip64_size_signature = b'\x01\x00'
+_zip64_value = 0xFFFFFFFF
+_unsigned_short = Struct('<H')
+_unsupported_flags = 0b0010000001110001  # Encrypted, enhanced deflating, patched, strong encrypted, masked
+
+
+def _parse_extra(extra):
+    extra_offset = 0
+    while extra_offset <= len(extra) - 4:
+        extra_signature = extra[extra_offset:extra_offset+2]
+        extra_data_size, = _unsigned_short.unpack(extra[extra_offset+2:extra_offset+4])
+        yield extra_signature, extra[extra_offset+4:extra_offset+4+extra_data_size]
+        extra_offset += 4 + extra_data_size
+
+
+def _random_access_content_xml(read_range, size, chunk_size):
+    # Yields the decompressed chunks of content.xml, finding it and checking the mimetype member
+    # from the ZIP central directory. Errors in the ZIP structure are the exceptions of stream-unzip
+
+    end_of_central_directory_struct = Struct('<HHHHIIH')
+    zip64_end_of_central_directory_locator_signature = b'PK\x06\x07'
+    zip64_end_of_central_directory_locator_struct = Struct('<IQI')
+    zip64_end_of_central_directory_signature = b'PK\x06\x06'
+    zip64_end_of_central_directory_struct = Struct('<QHHIIQQQQ')
+    central_directory_struct = Struct('<HHHHHHIIIHHHHHII')
+    unsigned_long_long = Struct('<Q')
+    max_comment_len = 0xFFFF
+
+    def read_exactly(offset, length):
+        data = read_range(offset, length) if offset >= 0 else b''
+        if len(data) != length:
+            raise TruncatedDataError()
+        return data
+
+    def central_directory_location():
+        # The end of central directory record is at the end of the file, followed only by a comment
+        # of up to 65535 bytes
+        tail_size = min(size, end_of_central_directory_struct.size + 4 + max_comment_len)
+        tail = read_exactly(size - tail_size, tail_size)
+        eocd_offset = tail.rfind(_end_of_central_directory_signature)
+        if eocd_offset == -1:
+            raise UnexpectedSignatureError(tail[:4])
+        if len(tail) < eocd_offset + 4 + end_of_central_directory_struct.size:
+            raise TruncatedDataError()
+
+        _, _, _, num_entries, cd_size, cd_offset, _ = end_of_central_directory_struct.unpack(
+            tail[eocd_offset+4:eocd_offset+4+end_of_central_directory_struct.size])
+        if _zip64_value not in (cd_size, cd_offset) and num_entries != 0xFFFF:
+            return cd_offset, cd_size
+
+        locator_offset = size - tail_size + eocd_offset - 4 - zip64_end_of_central_directory_locator_struct.size
+        locator = read_exactly(locator_offset, 4 + zip64_end_of_central_directory_locator_struct.size)
+        if locator[:4] != zip64_end_of_central_directory_locator_signature:
+            raise UnexpectedSignatureError(locator[:4])
+        _, zip64_eocd_offset, _ = zip64_end_of_central_directory_locator_struct.unpack(locator[4:])
+
+        zip64_eocd = read_exactly(zip64_eocd_offset, 4 + zip64_end_of_central_directory_struct.size)
+        if zip64_eocd[:4] != zip64_end_of_central_directory_signature:
+            raise UnexpectedSignatureError(zip64_eocd[:4])
+        _, _, _, _, _, _, _, cd_size, cd_offset = zip64_end_of_central_directory_struct.unpack(zip64_eocd[4:])
+        return cd_offset, cd_size
+
+    def central_directory_entries(cd):
+        # Yields (name, flags, compression, crc_32, compressed_size, uncompressed_size, offset) of
+        # each member, taking the Zip64 extra field into account
+        offset = 0
+        while offset < len(cd):
+            if cd[offset:offset+4] != _central_directory_signature:
+                raise UnexpectedSignatureError(cd[offset:offset+4])
+            if len(cd) < offset + 4 + central_directory_struct.size:
+                raise TruncatedDataError()
+            _, _, flags, compression, _, _, crc_32, compressed_size, uncompressed_size, file_name_len, extra_field_len, comment_len, _, _, _, local_header_offset = \
+                central_directory_struct.unpack(cd[offset+4:offset+4+central_directory_struct.size])
+            name_offset = offset + 4 + central_directory_struct.size
+            file_name = cd[name_offset:name_offset+file_name_len]
+            extra = dict(_parse_extra(cd[name_offset+file_name_len:name_offset+file_name_len+extra_field_len]))
+
+            # Only the values that don't fit in 32 bits are in the Zip64 extra field, in this order
+            zip64_extra = extra.get(_zip64_size_signature, b'')
+            zip64_offset = 0
+
+            def zip64_or(value):
+                nonlocal zip64_offset
+                if value != _zip64_value or len(zip64_extra) < zip64_offset + 8:
+                    return value
+                value, = unsigned_long_long.unpack(zip64_extra[zip64_offset:zip64_offset+8])
+                zip64_offset += 8
+                return value
+
+            uncompressed_size = zip64_or(uncompressed_size)
+            compressed_size = zip64_or(compressed_size)
+            local_header_offset = zip64_or(local_header_offset)
+
+            yield file_name, flags, compression, crc_32, compressed_size, uncompressed_size, local_header_offset
+            offset = name_offset + file_name_len + extra_field_len + comment_len
+
+    def member_chunks(flags, compression, crc_32_expected, compressed_size, uncompressed_size, local_header_offset):
+        if flags & _unsupported_flags:
+            raise UnsupportedFlagsError(flags)
+
+        if compression not in (0, 8):
+            raise UnsupportedCompressionTypeError(compression)
+
+        local_file_header = read_exactly(local_header_offset, 4 + _local_file_header_struct.size)
+        if local_file_header[:4] != _local_file_header_signature:
+            raise UnexpectedSignatureError(local_file_header[:4])
+        _, _, _, _, _, _, _, _, file_name_len, extra_field_len = _local_file_header_struct.unpack(local_file_header[4:])
+        data_offset = local_header_offset + 4 + _local_file_header_struct.size + file_name_len + extra_field_len
+
+        crc_32_actual = zlib.crc32(b'')
+        num_uncompressed = 0
+        dobj = zlib.decompressobj(wbits=-zlib.MAX_WBITS) if compression == 8 else None
+
+        # The sizes from the central directory are trusted only as far as how much to read: what
+        # is read is still checked against them and the CRC-32
+        for compressed_offset in range(0, compressed_size, chunk_size):
+            compressed_chunk = read_exactly(data_offset + compressed_offset, min(chunk_size, compressed_size - compressed_offset))
+            while compressed_chunk:
+                if dobj is None:
+                    chunk, compressed_chunk = compressed_chunk, b''
+                else:
+                    if dobj.eof:
+                        raise CompressedSizeIntegrityError()
+                    try:
+                        chunk = dobj.decompress(compressed_chunk, chunk_size)
+                    except zlib.error as e:
+                        raise DeflateError() from e
+                    compressed_chunk = dobj.unconsumed_tail
+                if chunk:
+                    crc_32_actual = zlib.crc32(chunk, crc_32_actual)
+                    num_uncompressed += len(chunk)
+                    yield chunk
+
+        if dobj is not None and (not dobj.eof or dobj.unused_data):
+            raise CompressedSizeIntegrityError()
+
+        if crc_32_expected != crc_32_actual:
+            raise CRC32IntegrityError()
+
+        if uncompressed_size != num_uncompressed:
+            raise UncompressedSizeIntegrityError()
+
+    cd_offset, cd_size = central_directory_location()
+    entries = sorted(central_directory_entries(read_exactly(cd_offset, cd_size)), key=lambda entry: entry[6])
+
+    if not entries or entries[0][0] != b'mimetype':
+        raise MissingMIMETypeError()
+
+    mimetype = b''
+    for chunk in member_chunks(*entries[0][1:]):
+        mimetype += chunk
+        if len(mimetype) >= len(_correct_mimetype):
+            break
+    if mimetype != _correct_mimetype:
+        raise IncorrectMIMETypeError(mimetype.decode("utf-8"))
+
+    content_xml_entry = next((entry for entry in entries if entry[0] == b'content.xml'), None)
+    if content_xml_entry is None:
+        raise MissingContentXMLError()
+
+    yield from member_chunks(*content_xml_entry[1:])
+
+
+def _read_content_xml(content_xml_chunks, max_string_length, max_columns, max_split_cells, raw_values=False, sheets=None, usecols=None, skip_rows=0, max_rows=None, numeric='decimal', cell_cache=None, column_runs=False, row_runs=False, max_repeated_rows=1048576, stats=None, engine='tree', scan=False, prefetch_bytes=0, lazy=False, string_overflow='raise', spool=False, spool_max_memory=16777216, spool_max_disk=1073741824, intern_strings=0):
+    # Shared by the streaming and random-access readers: parses the decompressed chunks of
+    # content.xml and yields the sheets and rows. If prefetch_bytes is non-zero, the chunks are
+    # read and decompressed in a background thread
+
+    def parse_xml(chunks):
+        # Each decompressed chunk is fed directly into lxml's push parser, so bytes are never
+        # sliced or joined on the way from stream-unzip to lxml
+        feed, close, read_events = new_parser()
+        for chunk in chunks:
+            feed(chunk)
+            yield from read_events()
+        close()
+        yield from read_events()
+
+    def parse_xml_with_stats(chunks):
+        feed, close, read_events = new_parser()
+        for chunk in chunks:
+            previous_stage = stats._switch('xml')
             try:
-                return next(it)
-            except etree.LxmlError as e:
-                raise InvalidContentXMLError() from e
+                feed(chunk)
+            finally:
+                stats._switch(previous_stage)
+            for event_element in read_events():
+                stats.xml_events += 1
+                yield event_element
+        previous_stage = stats._switch('xml')
+        try:
+            close()
+        finally:
+            stats._switch(previous_stage)
+        for event_element in read_events():
+            stats.xml_events += 1
+            yield event_element
+
+    def tree_parser():
+        parser = etree.XMLPullParser(events=('start', 'end'), resolve_entities=False)
+        return parser.feed, parser.close, parser.read_events
+
+    new_parser = \
+        tree_parser if engine == 'tree' else \
+        partial(_target_parser, max_string_length) if engine == 'target' else \
+        _error(ValueError("engine must be one of 'tree' or 'target'"))
+
+    if prefetch_bytes and stats is not None:
+        raise ValueError('stats cannot be combined with prefetch_bytes')
+
+    if prefetch_bytes:
+        content_xml_chunks = _prefetched(content_xml_chunks, prefetch_bytes)
+
+    content_xml_parsed = \
+        parse_xml(content_xml_chunks) if stats is None else \
+        parse_xml_with_stats(stats._timed(content_xml_chunks, 'unzip', stats._count_decompressed))
+
+    sheets_and_rows = _get_sheets_and_rows(content_xml_parsed, max_string_length, max_columns, max_split_cells, raw_values=raw_values, sheets=sheets, usecols=usecols, skip_rows=skip_rows, max_rows=max_rows, numeric=numeric, cell_cache=cell_cache, column_runs=column_runs, row_runs=row_runs, max_repeated_rows=max_repeated_rows, stats=stats, engine=engine, scan=scan, lazy=lazy, string_overflow=string_overflow, spool=spool, spool_max_memory=spool_max_memory, spool_max_disk=spool_max_disk, intern_strings=intern_strings)
+    if stats is not None:
+        sheets_and_rows = stats._timed(sheets_and_rows, 'rows')
+
+    try:
+        yield from sheets_and_rows
+    except UnzipValueError as e:
+        raise UnzipError() from e
 
-        def _append(l, value):
-            if len(l) == max_columns:
+    # If we stopped before the end of the file because all of the selected rows have been read,
+    # this releases the XML parser and decompressor without pulling any more chunks
+    content_xml_parsed.close()
+    content_xml_chunks.close()
+
+
+def _prefetched(chunks, prefetch_bytes):
+    # Iterates chunks in a background thread, buffering them until there are at least
+    # prefetch_bytes. zlib and I/O release the GIL, so this overlaps them with parsing. Any
+    # exception from the thread is raised once the chunks before it have been returned
+    condition = threading.Condition()
+    buffered = deque()
+    num_buffered_bytes = 0
+    done = False
+    stopped = False
+    exception = None
+
+    def produce():
+        nonlocal num_buffered_bytes, done, exception
+        try:
+            for chunk in chunks:
+                with condition:
+                    while num_buffered_bytes >= prefetch_bytes and not stopped:
+                        condition.wait()
+                    if stopped:
+                        break
+                    buffered.append(chunk)
+                    num_buffered_bytes += len(chunk)
+                    condition.notify()
+            chunks.close()
+        except BaseException as e:
+            exception = e
+        finally:
+            with condition:
+                done = True
+                condition.notify()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    # The thread is always finished before returning, so the chunks are not iterated after the
+    # caller closes what they are from
+    try:
+        while True:
+            with condition:
+                while not buffered and not done:
+                    condition.wait()
+                if not buffered:
+                    break
+                chunk = buffered.popleft()
+                num_buffered_bytes -= len(chunk)
+                condition.notify()
+            yield chunk
+    finally:
+        with condition:
+            stopped = True
+            condition.notify()
+        thread.join()
+
+    if exception is not None:
+        raise exception
+
+
+def _get_sheets_and_rows(parsed_xml, max_string_length, max_columns, max_split_cells, raw_values=False, sheets=None, usecols=None, skip_rows=0, max_rows=None, numeric='decimal', cell_cache=None, column_runs=False, row_runs=False, max_repeated_rows=1048576, stats=None, engine='tree', scan=False, lazy=False, string_overflow='raise', spool=False, spool_max_memory=16777216, spool_max_disk=1073741824, intern_strings=0):
+    # If raw_values is True, each cell is a (value_type, value) pair of its strings from the XML,
+    # rather than the parsed Python value - see _parse_value for what these strings are. If
+    # column_runs is True, each row is a tuple of (value, number of columns) pairs, and if row_runs
+    # is True, rows are returned as (row, number of rows) pairs. If scan is True, then rather than
+    # (sheet_name, rows) pairs, a SheetScan of each sheet is yielded. If lazy is True, rows are
+    # LazyRow instances made from the raw values. If spool is True, then rather than raising
+    # UnfinishedIterationError, the rest of the rows of a sheet are spooled when the next sheet is
+    # requested. If intern_strings is more than 0, up to that many distinct strings of each sheet
+    # are interned, so equal strings in the sheet are the same object
+
+    usecols = tuple(usecols) if usecols is not None else None
+    if column_runs and usecols is not None:
+        raise ValueError('column_runs cannot be combined with usecols')
+    if column_runs and lazy:
+        raise ValueError('column_runs cannot be combined with lazy')
+    if spool and lazy:
+        raise ValueError('spool cannot be combined with lazy')
+    raw_values = raw_values or lazy
+    if string_overflow not in ('raise', 'truncate'):
+        raise ValueError("string_overflow must be one of 'raise' or 'truncate'")
+    cell_cache = cell_cache if cell_cache is not None else CellCache()
+    parse_value = cell_cache._cached(numeric, _value_parser(numeric))
+    if stats is not None:
+        parse_value = stats._timed_function(parse_value, 'convert')
+    sheets = sheets if sheets is None or callable(sheets) else frozenset(sheets)
+
+    ns_table = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+    ns_text = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+    ns_office = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+
+    def _next(it):
+        try:
+            return next(it)
+        except etree.LxmlError as e:
+            raise InvalidContentXMLError() from e
+
+    def count_attrib(element, name):
+        # The number of times a row or cell is repeated or spanned, which must be at least 1
+        try:
+            count = int(element.attrib.get(f'{ns_table}{name}', '1'))
+        except ValueError as e:
+            raise InvalidODSXMLError from e
+        if count < 1:
+            raise InvalidODSXMLError(f'{name} must be at least 1')
+        return count
+
+    def table_rows(parsed_xml_it):
+        nonlocal table_ended
+        row = None
+        row_width = 0
+        num_pending_nones = 0
+        num_rows_repeated = 1
+
+        # The repeats of an empty row after its first are only returned once we know that another
+        # row follows them. So empty rows at the end of a table, which Excel outputs repeated a
+        # million or so times, are returned once
+        empty_row = None
+        num_pending_empty_rows = 0
+
+        # Each merged cell is stored as a region: the columns it covers from start up to but not
+        # including end, the row it ends before, the number of cells it's split into, and its value.
+        # Regions are sorted by start column, which is also kept in its own list to bisect, and
+        # are removed once we're past their last row
+        covered_region_starts = []
+        covered_regions = []
+        num_covered_cells = 0
+        i = 0
+        j = 0
+        rows_end = skip_rows + max_rows if max_rows is not None else None
+
+        # If there is a column projection, rows are dicts of column index to value, and only cells
+        # in the wanted columns have their values parsed. Column names need the values of the
+        # first row to be resolved to indexes, so until then all columns are wanted
+        column_indexes = \
+            None if usecols is None else \
+            list(usecols) if all(isinstance(column, int) for column in usecols) else \
+            None
+        wanted = set(column_indexes) if column_indexes is not None else None
+
+        def wanted_in(start, num):
+            # The wanted column indexes in [start, start + num)
+            return \
+                range(start, start + num) if wanted is None else \
+                [c for c in range(start, start + num) if c in wanted] if num < len(wanted) else \
+                sorted(c for c in wanted if start <= c < start + num)
+
+        def set_values(row, start, num, value):
+            nonlocal row_width, num_pending_nones
+
+            if wanted is not None:
+                for c in wanted_in(start, num):
+                    row[c] = value
+                return
+
+            # Excel ODS files output a _lot_ of trailing empty cells, often as a single cell repeated
+            # thousands of times. So runs of empty cells are only added to the row if a non-empty
+            # cell follows them, which means trailing empty cells are never added
+            if value is None:
+                num_pending_nones += num
+                return
+
+            if row_width + num_pending_nones + num > max_columns:
                 raise TooManyColumnsError(max_columns)
-            l.append(value)
 
-        def table_rows(parsed_xml_it):
-            row = None
+            if column_runs:
+                if num_pending_nones:
+                    row.append((None, num_pending_nones))
+                if row and row[-1][0] is value:
+                    row[-1] = (value, row[-1][1] + num)
+                else:
+                    row.append((value, num))
+            else:
+                row.extend(repeat(None, num_pending_nones))
+                row.extend(repeat(value, num))
+
+            row_width += num_pending_nones + num
+            num_pending_nones = 0
+
+        def resolve_column_indexes(header_row):
+            nonlocal column_indexes, wanted
+
+            header_values = [
+                parse_value(*value) if raw_values and value is not None else value
+                for value in header_row
+            ]
+
+            def column_index(column):
+                try:
+                    return column if isinstance(column, int) else header_values.index(column)
+                except ValueError:
+                    raise ColumnNotFoundError(column) from None
+
+            column_indexes = [column_index(column) for column in usecols]
+            wanted = set(column_indexes)
+            remove_covered_regions(lambda start, end, end_row: not wanted_in(start, end - start))
+
+        def add_covered_region(start, end, end_row, num_split_cells, value):
+            nonlocal num_covered_cells
+            if num_covered_cells + num_split_cells > max_split_cells:
+                raise TooManySplitCells(max_split_cells)
+            k = bisect_right(covered_region_starts, start)
+            covered_region_starts.insert(k, start)
+            covered_regions.insert(k, (start, end, end_row, num_split_cells, value))
+            num_covered_cells += num_split_cells
+
+        def remove_covered_regions(should_remove):
+            nonlocal num_covered_cells
+            for k in range(len(covered_regions) - 1, -1, -1):
+                start, end, end_row, num_split_cells, _ = covered_regions[k]
+                if should_remove(start, end, end_row):
+                    del covered_region_starts[k]
+                    del covered_regions[k]
+                    num_covered_cells -= num_split_cells
+
+        def covered_value(c):
+            k = bisect_right(covered_region_starts, c) - 1
+            if k < 0:
+                raise InvalidODSXMLError()
+            start, end, end_row, _, value = covered_regions[k]
+            if c >= end or j >= end_row:
+                raise InvalidODSXMLError()
+            return value
+
+        def projected(row):
+            return \
+                tuple(row) if usecols is None else \
+                tuple(row.get(c) for c in column_indexes) if isinstance(row, dict) else \
+                tuple(row[c] if c < len(row) else None for c in column_indexes)
+
+        def repeated_rows(row, num):
+            # The same tuple is returned for each repeat, so the row is not parsed again
+            if num == 0:
+                return
+            if lazy:
+                row = LazyRow(row, parse_value)
+            if row_runs:
+                yield row, num
+                return
+            if num > max_repeated_rows:
+                raise TooManyRepeatedRowsError(max_repeated_rows)
+            yield from repeat(row, num)
+
+        def pending_empty_rows():
+            nonlocal num_pending_empty_rows
+            rows = repeated_rows(empty_row, num_pending_empty_rows)
+            num_pending_empty_rows = 0
+            return rows
 
-            covered_cells = {}
-            i = 0
-            j = 0
+        while True:
+            event, element = _next(parsed_xml_it)
 
-            def trim_trailing_nones(values):
-                # Excel ODS files output a _lot_ of trailing Nones
-                end = len(values)
-                for i in range(len(values) - 1, -1, -1):
-                    if values[i] is not None:
-                        break
-                    end = i
-                return tuple(values[0:end])
+            # Starting a row, unless we have already returned max_rows rows, in which case the rest
+            # of the table is not read
+            if event == 'start' and f'{ns_table}table-row' == element.tag:
+                if rows_end is not None and j >= rows_end:
+                    yield from pending_empty_rows()
+                    return
+                row = [] if wanted is None else {}
+                row_width = 0
+                num_pending_nones = 0
+                if covered_regions:
+                    remove_covered_regions(lambda start, end, end_row: end_row <= j)
+
+                num_rows_repeated = count_attrib(element, 'number-rows-repeated')
+
+            # Ending a row, returning each of its repeats that are after skip_rows and within max_rows
+            if event == 'end' and f'{ns_table}table-row' == element.tag:
+                end_j = \
+                    j + num_rows_repeated if rows_end is None else \
+                    min(j + num_rows_repeated, rows_end)
+                num_returned = end_j - max(j, skip_rows)
+                if num_returned > 0:
+                    if usecols is not None and column_indexes is None:
+                        resolve_column_indexes(row)
+                    row = projected(row)
+                    yield from pending_empty_rows()
+                    if all(value is None for value in row):
+                        yield from repeated_rows(row, 1)
+                        empty_row = row
+                        num_pending_empty_rows = num_returned - 1
+                    else:
+                        yield from repeated_rows(row, num_returned)
+                i = 0
+                j += num_rows_repeated
+
+            if event == 'start' and f'{ns_table}covered-table-cell' == element.tag:
+                num_repeats = count_attrib(element, 'number-columns-repeated')
+
+                for c in wanted_in(i, num_repeats) if j + num_rows_repeated > skip_rows else ():
+                    set_values(row, c, 1, covered_value(c))
+                    if stats is not None:
+                        stats.covered_cells += 1
+                i += num_repeats
+
+            # Starting a table cell
+            if event == 'start' and f'{ns_table}table-cell' == element.tag:
+                num_repeats = count_attrib(element, 'number-columns-repeated')
+                num_col_spans = count_attrib(element, 'number-columns-spanned')
+                num_row_spans = count_attrib(element, 'number-rows-spanned')
+
+                if num_repeats > 1 and (num_col_spans > 1 or num_row_spans > 1):
+                    # Have not seen a real world example of this. For now, seems safer to fail
+                    raise InvalidODSXMLError('Cell row or column spanning combined with repeats is not supported')
+
+                if num_rows_repeated > 1 and num_row_spans > 1:
+                    raise InvalidODSXMLError('Cell row spanning in repeated rows is not supported')
+
+                # Cells that are not wanted, and don't span into wanted columns, are not parsed. The
+                # same goes for cells in skipped rows that don't span into rows after them. Any
+                # text in them is skipped over by this loop since it doesn't act on text tags
+                if (wanted is None or wanted_in(i, max(num_repeats, num_col_spans))) and j + max(num_row_spans, num_rows_repeated) > skip_rows:
+                    value = table_cell(parsed_xml_it, element)
+
+                    # The cells the merged cell is split into that will be returned, other than itself
+                    if num_col_spans > 1 or num_row_spans > 1:
+                        num_split_cells = \
+                            len(wanted_in(i, num_col_spans)) * (j + num_row_spans - max(j, skip_rows)) - \
+                            ((wanted is None or i in wanted) and j >= skip_rows)
+                        add_covered_region(i, i + num_col_spans, j + num_row_spans, num_split_cells, value)
+
+                    if j + num_rows_repeated > skip_rows:
+                        set_values(row, i, num_repeats, value)
+
+                i += num_repeats
+
+            # Ending the table
+            if event == 'end' and f'{ns_table}table' == element.tag:
+                table_ended = True
+                return
 
+            clear_mem(event, element)
+
+    def scan_table(parsed_xml_it, sheet_name):
+        nonlocal table_ended
+        num_rows = 0
+        num_non_empty_rows = 0
+        num_columns = 0
+        num_merged_cells = 0
+        num_rows_repeated = 1
+        row_num_non_empty_rows = 0
+        row_num_columns = 0
+        i = 0
+
+        try:
             while True:
                 event, element = _next(parsed_xml_it)
 
-                # Starting a row
                 if event == 'start' and f'{ns_table}table-row' == element.tag:
-                    row = []
+                    num_rows_repeated = count_attrib(element, 'number-rows-repeated')
+                    row_num_non_empty_rows = 0
+                    row_num_columns = 0
+                    i = 0
 
-                # Ending a row
+                # Only complete rows are counted, so if max_bytes is reached, a row that was only
+                # partly read is not
                 if event == 'end' and f'{ns_table}table-row' == element.tag:
-                    yield trim_trailing_nones(row)
-                    i = 0
-                    j += 1
+                    num_non_empty_rows = max(num_non_empty_rows, row_num_non_empty_rows)
+                    num_columns = max(num_columns, row_num_columns)
+                    num_rows += num_rows_repeated
 
                 if event == 'start' and f'{ns_table}covered-table-cell' == element.tag:
-                    try:
-                        num_repeats = int(element.attrib.get(f'{ns_table}number-columns-repeated', '1'))
-                    except ValueError as e:
-                        raise InvalidODSXMLError from e
-
-                    for r in range(0, num_repeats):
-                        try:
-                            value = covered_cells.pop((i, j))
-                        except KeyError as e:
-                            raise InvalidODSXMLError from e
-                        _append(row, value)
-                        i += 1
+                    i += count_attrib(element, 'number-columns-repeated')
 
-                # Starting a table cell
+                # The extents include the cells that merged cells are split into, since they are
+                # returned with the merged cell's value
                 if event == 'start' and f'{ns_table}table-cell' == element.tag:
-                    try:
-                        num_repeats = int(element.attrib.get(f'{ns_table}number-columns-repeated', '1'))
-                    except ValueError as e:
-                        raise InvalidODSXMLError from e
+                    num_repeats = count_attrib(element, 'number-columns-repeated')
+                    num_col_spans = count_attrib(element, 'number-columns-spanned')
+                    num_row_spans = count_attrib(element, 'number-rows-spanned')
+                    if num_col_spans > 1 or num_row_spans > 1:
+                        num_merged_cells += 1
+                    if f'{ns_office}value-type' in element.attrib:
+                        row_num_columns = max(row_num_columns, i + max(num_repeats, num_col_spans))
+                        row_num_non_empty_rows = max(row_num_non_empty_rows, num_rows + max(num_rows_repeated, num_row_spans))
+                    i += num_repeats
 
-                    try:
-                        num_col_spans = int(element.attrib.get(f'{ns_table}number-columns-spanned', '1'))
-                    except ValueError as e:
-                        raise InvalidODSXMLError from e
+                if event == 'end' and f'{ns_table}table' == element.tag:
+                    table_ended = True
+                    return SheetScan(sheet_name, num_rows, num_non_empty_rows, num_columns, num_merged_cells, True)
 
-                    try:
-                        num_row_spans = int(element.attrib.get(f'{ns_table}number-rows-spanned', '1'))
-                    except ValueError as e:
-                        raise InvalidODSXMLError from e
+                clear_mem(event, element)
 
-                    if num_repeats > 1 and (num_col_spans > 1 or num_row_spans > 1):
-                        # Have not seen a real world example of this. For now, seems safer to fail
-                        raise InvalidODSXMLError('Cell row or column spanning combined with repeats is not supported')
+        except _ByteBudgetReached:
+            return SheetScan(sheet_name, num_rows, num_non_empty_rows, num_columns, num_merged_cells, False)
 
-                    value = table_cell(parsed_xml_it, element)
-                    covered_cell_indexes = (
-                        (r, s)
-                        for r in range(0, num_col_spans)
-                        for s in range(0, num_row_spans)
-                        if r != 0 or s !=0
-                    )
-                    for r, s in covered_cell_indexes:
-                        if len(covered_cells) == max_split_cells:
-                            raise TooManySplitCells(max_split_cells)
-                        covered_cells[(i + r, j + s)] = value
-
-                    for r in range(0, num_repeats):
-                        _append(row, value)
-                        i += 1
-
-
-                # Ending the table
-                if event == 'end' and f'{ns_table}table' == element.tag:
+    def table_cell(parsed_xml_it, cell_element):
+        value_type = cell_element.attrib.get(f'{ns_office}value-type')
+        if value_type is None:
+            return None
+
+        if stats is not None:
+            stats.cells[value_type] += 1
+
+        value = \
+            cell_element.attrib[f'{ns_office}boolean-value'] if value_type == 'boolean' else \
+            (cell_element.attrib[f'{ns_office}value'], cell_element.attrib.get(f'{ns_office}currency')) if value_type == 'currency' else \
+            cell_element.attrib[f'{ns_office}date-value'] if value_type == 'date' else \
+            cell_element.attrib[f'{ns_office}value'] if value_type == 'float' else \
+            cell_element.attrib[f'{ns_office}value'] if value_type == 'percentage' else \
+            parse_string(cell_element, parsed_xml_it) if value_type == 'string' else \
+            cell_element.attrib[f'{ns_office}time-value'] if value_type == 'time' else \
+            _error(InvalidTypeError(value_type))
+
+        return \
+            (value_type, value) if raw_values else \
+            parse_value(value_type, value)
+
+    def parse_string(cell_element, parsed_xml_it):
+
+        def itertext():
+            # Like lxml's itertext, but doesn't use recursion, clears memory along the way, and
+            # converts all p tags after the first into a newline. The text of an element is
+            # complete once its first child starts or it ends, and its tail once the next event
+            # happens, so fragments are appended in order and joined once at the end
+            parts = []
+            l = 0
+            truncated = False
+            seen_p = False
+            open_elements = [cell_element]
+            text_added = [False]
+            tail_element = None
+
+            def add(text):
+                nonlocal l, truncated
+                if truncated or not text:
                     return
+                if l + len(text) > max_string_length:
+                    if string_overflow == 'raise':
+                        raise StringTooLongError(max_string_length)
+                    text = text[:max_string_length - l]
+                    truncated = True
+                parts.append(text)
+                l += len(text)
+
+            def add_text(element):
+                if element.tag == f'{ns_text}p' and seen_p:
+                    add('\n')
+                add(element.text)
 
-                clear_mem(event, element)
+            while True:
+                event, element = _next(parsed_xml_it)
 
-        def table_cell(parsed_xml_it, cell_element):
-            value_type = cell_element.attrib.get(f'{ns_office}value-type')
-            return \
-                None if value_type is None else \
-                parse_boolean(cell_element) if value_type == 'boolean' else \
-                parse_currency(cell_element) if value_type == 'currency' else \
-                parse_date(cell_element) if value_type == 'date' else \
-                parse_float(cell_element) if value_type == 'float' else \
-                parse_percentage(cell_element) if value_type == 'percentage' else \
-                parse_string(cell_element, parsed_xml_it) if value_type == 'string' else \
-                parse_time(cell_element) if value_type == 'time' else \
-                error(InvalidTypeError(value_type))
-
-        def error(e):
-            raise e(message)
-
-        def parse_boolean(cell_element):
-            value = cell_element.attrib[f'{ns_office}boolean-value']
-            return \
-                True if value == 'true' else \
-                False if value == 'false' else \
-                error(InvalidBooleanValueError(value))
+                if tail_element is not None:
+                    add(tail_element.tail)
+                    clear_mem('end', tail_element)
+                    tail_element = None
+
+                if event == 'start':
+                    if not text_added[-1]:
+                        add_text(open_elements[-1])
+                        text_added[-1] = True
+                    open_elements.append(element)
+                    text_added.append(False)
+
+                if event == 'end':
+                    open_elements.pop()
+                    if not text_added.pop():
+                        add_text(element)
+                    if element is cell_element:
+                        clear_mem(event, element)
+                        break
+                    if element.tag == f'{ns_text}p':
+                        seen_p = True
+                    tail_element = element
 
-        def parse_currency(cell_element):
-            value = cell_element.attrib[f'{ns_office}value']
-            try:
-                return Currency(value, code=cell_element.attrib.get(f'{ns_office}currency'))
-            except InvalidOperation as e:
-                raise InvalidCurrencyValueError(value) from e
+            return ''.join(parts)
 
-        def parse_date(cell_element):
-            value = cell_element.attrib[f'{ns_office}date-value']
-            try:
-                try:
-                    return date.fromisoformat(value)
-                except ValueError:
-                    return datetime.fromisoformat(value)
-            except ValueError as e:
-                raise InvalidDateValueError(value) from e
+        attribute_string_value = cell_element.attrib.get(f'{ns_office}:string-value')
+        string = \
+            attribute_string_value if attribute_string_value is not None else \
+            itertext()
+        return \
+            string if not intern_strings else \
+            intern_string(string)
+
+    def intern_string(string):
+        try:
+            return interned_strings[string]
+        except KeyError:
+            if len(interned_strings) < intern_strings:
+                interned_strings[string] = string
+            return string
+
+    def clear_mem(event, element):
+        if event == 'end':
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    if engine == 'target':
+        # Elements from the parser target are not in a tree, so there is nothing to clear
+        def clear_mem(event, element):
+            pass
 
-        def parse_float(cell_element):
-            value = cell_element.attrib[f'{ns_office}value']
-            try:
-                return Decimal(value)
-            except InvalidOperation as e:
-                raise InvalidFloatValueError(value) from e
+    def skip_table(parsed_xml_it, table_element):
+        # Fast-forwards to the end of the table, without looking at any of its rows or cells
+        while True:
+            event, element = _next(parsed_xml_it)
+            clear_mem(event, element)
+            if event == 'end' and element is table_element:
+                break
+
+    spooled_memory = 0
+    spooled_memory_lock = threading.Lock()
+    spooled_disk = 0
+
+    def spooled(rows):
+        # Reads the rest of the rows, pickled in batches, into memory while the total across all
+        # sheets is within spool_max_memory, and then into a temporary file
+        nonlocal spooled_memory, spooled_disk
+        batches_in_memory = deque()
+        f = None
+
+        try:
+            while True:
+                rows_in_batch = list(islice(rows, 1024))
+                if not rows_in_batch:
+                    break
+                batch = pickle.dumps(rows_in_batch, protocol=pickle.HIGHEST_PROTOCOL)
+                with spooled_memory_lock:
+                    in_memory = f is None and spooled_memory + len(batch) <= spool_max_memory
+                    if in_memory:
+                        spooled_memory += len(batch)
+                if in_memory:
+                    batches_in_memory.append(batch)
+                    continue
+                if spooled_disk + len(batch) > spool_max_disk:
+                    raise SpoolTooLargeError(spool_max_disk)
+                if f is None:
+                    f = tempfile.TemporaryFile()
+                f.write(batch)
+                spooled_disk += len(batch)
+        except BaseException:
+            if f is not None:
+                f.close()
+            raise
+
+        def spooled_rows():
+            nonlocal spooled_memory
+            while batches_in_memory:
+                batch = batches_in_memory.popleft()
+                with spooled_memory_lock:
+                    spooled_memory -= len(batch)
+                yield from pickle.loads(batch)
+
+            if f is not None:
+                with f:
+                    f.seek(0)
+                    while True:
+                        try:
+                            rows_in_batch = pickle.load(f)
+                        except EOFError:
+                            break
+                        yield from rows_in_batch
 
-        def parse_percentage(cell_element):
-            value = cell_element.attrib[f'{ns_office}value']
+        return spooled_rows()
+
+    def spoolable(rows):
+        # The rows of a sheet, and a function to call when the next sheet is requested that spools
+        # the rest of them, unless they have all been iterated over or the iterator was closed. The
+        # rows can be iterated over in another thread, so the lock is held while taking a row or
+        # spooling, since both advance the same parser
+        rows_it = rows
+        rows_lock = threading.Lock()
+        done = False
+
+        def sheet_rows():
+            nonlocal done
             try:
-                return Percentage(value)
-            except InvalidOperation as e:
-                raise InvalidPercentageValueError(e) from e
-
-        def parse_string(cell_element, parsed_xml_it):
-
-            def itertext():
-                # Like lxml's itertext, but doesn't use recursion, clears memory along the way, and
-                # converts all p tags after the first into a newline
-                l = 0
-                previous_event = None
-                seen_p = False
-                stack = ['', '']
                 while True:
-                    event, element = _next(parsed_xml_it)
+                    with rows_lock:
+                        try:
+                            row = next(rows_it)
+                        except StopIteration:
+                            break
+                    yield row
+            finally:
+                with rows_lock:
+                    done = True
 
-                    if event == 'start' and previous_event == 'start':
-                        stack.append('')
+        def spool_rest():
+            nonlocal rows_it
+            with rows_lock:
+                if not done:
+                    rows_it = spooled(rows_it)
 
-                    if event == 'end':
-                        newline = '\n' if element.tag == f'{ns_text}p' and seen_p else ''
-                        element_text = newline + (element.text or '')
-                        element_tail = (element.tail or '') if element is not cell_element else ''
-                        l += len(element_text) + len(element_tail)
-                        if l > max_string_length:
-                            raise StringTooLongError(max_string_length)
+        return sheet_rows(), spool_rest
 
-                        if previous_event == 'end':
-                            popped = stack.pop()
-                            stack[-1] += element_text + popped + element_tail
+    def is_selected(sheet_index, sheet_name):
+        return \
+            True if sheets is None else \
+            sheets(sheet_name) if callable(sheets) else \
+            sheet_name in sheets or sheet_index in sheets
+
+    # We use manual iteration to be able to delegate iterating
+    parsed_xml_it = iter(parsed_xml)
+    sheet_index = 0
+    table_ended = False
+    interned_strings = {}
+
+    # If specific sheets are selected, then once they have all been read we can stop
+    remaining_sheets = set(sheets) if sheets is not None and not callable(sheets) else None
+
+    while True:
+        try:
+            event, element = _next(parsed_xml_it)
+        except StopIteration:
+            break
+
+        # Starting a table
+        if event == 'start' and f'{ns_table}table' == element.tag:
+            sheet_name = element.attrib[f'{ns_table}name']
+            if is_selected(sheet_index, sheet_name):
+                table_ended = False
+                interned_strings = {}
+                if scan:
+                    sheet_scan = scan_table(parsed_xml_it, sheet_name)
+                    yield sheet_scan
+                    if not sheet_scan.complete:
+                        break
+                elif spool:
+                    rows = table_rows(parsed_xml_it)
+                    if stats is not None:
+                        rows = stats._timed(rows, 'rows', stats._count_row)
+                    rows, spool_rest = spoolable(rows)
+                    _closable_rows.add(rows)
+                    yield sheet_name, rows
+                    spool_rest()
+                else:
+                    rows = table_rows(parsed_xml_it)
+                    if stats is not None:
+                        rows = stats._timed(rows, 'rows', stats._count_row)
+                    _closable_rows.add(rows)
+                    yield sheet_name, rows
+                    for _ in rows:
+                        raise UnfinishedIterationError()
+
+                if remaining_sheets is not None:
+                    remaining_sheets -= {sheet_name, sheet_index}
+                    if not remaining_sheets:
+                        break
 
-                        if previous_event != 'end':
-                            stack[-1] += element_text + element_tail
+                # The rows can finish before the end of the table if max_rows is reached, or if
+                # the rows iterator is closed
+                if not table_ended:
+                    skip_table(parsed_xml_it, element)
+            else:
+                skip_table(parsed_xml_it, element)
+            sheet_index += 1
+
+        clear_mem(event, element)
+
+
+# Thanks to https://stackoverflow.com/a/2765366/1319998
+_time_regex = re.compile(r'(?P<sign>-?)P(?:(?P<years>\d+)Y)?(?:(?P<months>\d+)M)?(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>([0-9]*[.])?[0-9]+)S)?)?')
+
+
+def _parse_value(value_type, value):
+    # The value is the string of the office:boolean-value, office:date-value, office:time-value or
+    # office:value attribute depending on the value type, other than for currencies where it's a
+    # pair of office:value and office:currency, and for strings where it's the text of the cell
+    return \
+        _parse_boolean(value) if value_type == 'boolean' else \
+        _parse_currency(value) if value_type == 'currency' else \
+        _parse_date(value) if value_type == 'date' else \
+        _parse_float(value) if value_type == 'float' else \
+        _parse_percentage(value) if value_type == 'percentage' else \
+        value if value_type == 'string' else \
+        _parse_time(value) if value_type == 'time' else \
+        _error(InvalidTypeError(value_type))
+
+
+def _value_parser(numeric):
+    # Returns _parse_value, or a function like it that converts float, percentage and currency
+    # values, and the seconds of time values, to native floats or ints rather than Decimals. This
+    # loses precision, and the currency code, but is much faster
+    if numeric == 'decimal':
+        return _parse_value
+    if numeric not in ('float', 'int_if_integral'):
+        raise ValueError(numeric)
+
+    to_number = \
+        float if numeric == 'float' else \
+        _float_or_int
+
+    def parse_number(value, error_class):
+        try:
+            return to_number(value)
+        except ValueError as e:
+            raise error_class(value) from e
+
+    def parse_time(value):
+        match = _time_regex.match(value)
+        if match is None:
+            raise InvalidTimeValueError(value)
+        sign, years, months, days, hours, minutes, seconds = match.group('sign', 'years', 'months', 'days', 'hours', 'minutes', 'seconds')
+        return Time(
+            sign or '+',
+            int(years or 0),
+            int(months or 0),
+            int(days or 0),
+            int(hours or 0),
+            int(minutes or 0),
+            to_number(seconds or '0'),
+        )
+
+    def parse_value(value_type, value):
+        return \
+            _parse_boolean(value) if value_type == 'boolean' else \
+            parse_number(value[0], InvalidCurrencyValueError) if value_type == 'currency' else \
+            _parse_date(value) if value_type == 'date' else \
+            parse_number(value, InvalidFloatValueError) if value_type == 'float' else \
+            parse_number(value, InvalidPercentageValueError) if value_type == 'percentage' else \
+            value if value_type == 'string' else \
+            parse_time(value) if value_type == 'time' else \
+            _error(InvalidTypeError(value_type))
 
-                        clear_mem(event, element)
+    return parse_value
 
-                        if element is cell_element:
-                            break
 
-                        if element.tag == f'{ns_text}p':
-                            seen_p = True
+def _float_or_int(value):
+    # Whole numbers are converted exactly, rather than via a float that can't represent them all
+    try:
+        return int(value)
+    except ValueError:
+        pass
+
+    float_value = float(value)
+    if not float_value.is_integer():
+        return float_value
+
+    decimal_value = Decimal(value)
+    return \
+        int(decimal_value) if decimal_value == decimal_value.to_integral_value() else \
+        float_value
+
+
+def _error(e):
+    raise e
+
+
+class _TargetElement:
+    __slots__ = ('tag', 'attrib', 'text', 'tail')
+
+
+def _target_parser(max_text_length):
+    # An alternative to lxml's XMLPullParser, with the same feed, close and read_events functions,
+    # but rather than building a tree, lxml calls the below on each start tag, end tag and text.
+    # The elements have only what is read from them, and are not linked to each other, so are
+    # freed once they're no longer referenced. Each end event is held back until the next event
+    # so its element's tail is complete even if it's split over chunks. Text can arrive in many
+    # fragments, for example either side of each entity, so the fragments of the current text or
+    # tail are joined once it's complete, and are no longer collected once there are more than
+    # max_text_length characters of them, which is enough for the caller to know it's too long
+    events = []
+    stack = []
+    ended = None
+    fragments = []
+    fragments_length = 0
+    new_element = _TargetElement.__new__
+
+    # The same as libxml2's limit, which it doesn't enforce when there's a parser target
+    max_depth = 256
+
+    class Target:
+        pass
+
+    def join_fragments():
+        nonlocal fragments_length
+        if not fragments:
+            return
+        text = ''.join(fragments)
+        fragments.clear()
+        fragments_length = 0
+        if ended is not None:
+            ended.tail = text
+        else:
+            stack[-1].text = text
+
+    def start(tag, attrib):
+        nonlocal ended
+        join_fragments()
+        if ended is not None:
+            events.append(('end', ended))
+            ended = None
+        if len(stack) == max_depth:
+            raise InvalidContentXMLError()
+        element = new_element(_TargetElement)
+        element.tag = tag
+        element.attrib = attrib
+        element.text = None
+        element.tail = None
+        stack.append(element)
+        events.append(('start', element))
+
+    def end(tag):
+        nonlocal ended
+        join_fragments()
+        if ended is not None:
+            events.append(('end', ended))
+        ended = stack.pop()
+
+    def data(text):
+        nonlocal fragments_length
+        if fragments_length <= max_text_length:
+            fragments.append(text)
+            fragments_length += len(text)
+
+    def close():
+        nonlocal ended
+        join_fragments()
+        if ended is not None:
+            events.append(('end', ended))
+            ended = None
+
+    def read_events():
+        events_so_far = events[:]
+        events.clear()
+        return events_so_far
+
+    target = Target()
+    target.start = start
+    target.end = end
+    target.data = data
+    target.close = close
+    parser = etree.XMLParser(target=target, resolve_entities=False)
+
+    return parser.feed, parser.close, read_events
+
+
+def _parse_boolean(value):
+    return \
+        True if value == 'true' else \
+        False if value == 'false' else \
+        _error(InvalidBooleanValueError(value))
+
+
+def _parse_currency(value):
+    value, code = value
+    try:
+        return Currency(value, code=code)
+    except InvalidOperation as e:
+        raise InvalidCurrencyValueError(value) from e
+
 
-                    previous_event = event
+def _parse_date(value):
+    try:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise InvalidDateValueError(value) from e
+
+
+def _parse_float(value):
+    try:
+        return Decimal(value)
+    except InvalidOperation as e:
+        raise InvalidFloatValueError(value) from e
+
+
+def _parse_percentage(value):
+    try:
+        return Percentage(value)
+    except InvalidOperation as e:
+        raise InvalidPercentageValueError(value) from e
 
-                return stack[0]
 
-            attribute_string_value = cell_element.attrib.get(f'{ns_office}:string-value')
+def _parse_time(value):
+    try:
+        time_dict = _time_regex.match(value).groupdict(0)
+    except AttributeError as e:
+        raise InvalidTimeValueError(value) from e
+
+    return Time(
+        time_dict.get('sign') or '+',
+        int(time_dict.get('years', '0')),
+        int(time_dict.get('months', '0')),
+        int(time_dict.get('days', '0')),
+        int(time_dict.get('hours', '0')),
+        int(time_dict.get('minutes', '0')),
+        Decimal(time_dict.get('seconds', '0')),
+    )
+
+
+def _columnar_batch_converter(batch_format, dictionary_encode=False, max_dictionary_size=4096):
+    # Returns a function that is called for each sheet, and returns a function that converts a list
+    # of rows of (value_type, value) pairs to either a tuple of NumPy masked arrays, or a PyArrow
+    # RecordBatch. The type of each column is chosen from the first batch of the sheet in which it
+    # has a non-empty cell, and is kept for the rest of the sheet. Until then it is a PyArrow null
+    # column, or a NumPy array of masked objects. Rows don't have trailing empty cells, so a column
+    # can first appear in any batch, and is then in all later batches. Columns that only contain
+    # float, percentage or currency cells are converted to float64, boolean to bool, date to
+    # datetime64[us], and string to str, each by NumPy directly from the strings in the XML. Other
+    # columns are NumPy arrays of Python objects, or PyArrow arrays of the strings in the XML. If
+    # dictionary_encode is True, string columns with at most max_dictionary_size distinct strings
+    # in the batch their type is chosen from are instead DictionaryColumn instances, or PyArrow
+    # DictionaryArrays, each with a dictionary of only the strings in its batch
+
+    import numpy as np
+    pa = importlib.import_module('pyarrow') if batch_format == 'arrow' else None
+    if batch_format not in ('numpy', 'arrow'):
+        raise ValueError(batch_format)
+
+    value_types_of_kinds = {
+        'float': {'float', 'percentage', 'currency'},
+        'date': {'date'},
+        'boolean': {'boolean'},
+    }
+    invalid_value_errors = {
+        'boolean': InvalidBooleanValueError,
+        'currency': InvalidCurrencyValueError,
+        'date': InvalidDateValueError,
+        'float': InvalidFloatValueError,
+        'percentage': InvalidPercentageValueError,
+    }
+
+    def column_strings(cells, if_missing):
+        return [
+            if_missing if cell is None else
+            cell[1][0] if cell[0] == 'currency' else
+            cell[1]
+            for cell in cells
+        ]
+
+    def kind_of(cells):
+        value_types = {cell[0] for cell in cells if cell is not None}
+        return \
+            None if not value_types else \
+            'float' if value_types <= value_types_of_kinds['float'] else \
+            'date' if value_types == value_types_of_kinds['date'] else \
+            'boolean' if value_types == value_types_of_kinds['boolean'] else \
+            'dictionary' if value_types == {'string'} and dictionary_encode and len({cell[1] for cell in cells if cell is not None}) <= max_dictionary_size else \
+            'other'
+
+    def to_values(kind, cells):
+        return \
+            np.array(column_strings(cells, '0')).astype(np.float64) if kind == 'float' else \
+            np.array(column_strings(cells, 'NaT'), dtype='datetime64[us]') if kind == 'date' else \
+            np.array([cell is not None and _parse_boolean(cell[1]) for cell in cells], dtype=np.bool_)
+
+    def to_typed_values(kind, i, cells):
+        for cell in cells:
+            if cell is not None and cell[0] not in value_types_of_kinds[kind]:
+                raise SchemaMismatchError(f'Column {i} has a {cell[0]} cell, but is {kind} from an earlier batch of the sheet')
+
+        try:
+            return to_values(kind, cells)
+        except ValueError as e:
+            # Converting all the values at once doesn't say which is invalid, so it is found
+            for cell in cells:
+                try:
+                    to_values(kind, [cell])
+                except ValueError as cell_e:
+                    raise invalid_value_errors[cell[0]](column_strings([cell], None)[0]) from cell_e
+            raise InvalidValueError() from e
+
+    def to_dictionary_column(cells, mask):
+        # The dictionary is a dict of string to code, so its keys are in the order of the codes
+        dictionary = {}
+        codes = np.array([
+            0 if string is None else
+            dictionary.setdefault(string, len(dictionary))
+            for string in column_strings(cells, None)
+        ], dtype=np.int32)
+        strings = list(dictionary)
+
+        if pa is not None:
+            return pa.DictionaryArray.from_arrays(pa.array(codes, mask=mask), pa.array(strings, type=pa.string()))
+
+        return DictionaryColumn(np.ma.MaskedArray(codes, mask=mask), to_object_array(strings))
+
+    def to_column(kind, i, cells):
+        mask = np.array([cell is None for cell in cells], dtype=np.bool_)
+        if kind == 'dictionary':
+            return to_dictionary_column(cells, mask)
+
+        values = to_typed_values(kind, i, cells) if kind in value_types_of_kinds else None
+
+        if pa is not None:
             return \
-                attribute_string_value if attribute_string_value is not None else \
-                itertext()
+                pa.nulls(len(cells)) if kind is None else \
+                pa.array(values, mask=mask) if values is not None else \
+                pa.array(column_strings(cells, None), type=pa.string())
+
+        return np.ma.MaskedArray(
+            values if values is not None else
+            to_object_array([None if cell is None else _parse_value(*cell) for cell in cells]),
+            mask=mask,
+        )
+
+    def to_object_array(values):
+        # np.array would make Time values, which are tuples, into a dimension of their own
+        array = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            array[i] = value
+        return array
+
+    def sheet_batch_converter():
+        kinds = []
+
+        def to_batch(rows):
+            width = max(len(row) for row in rows)
+            kinds.extend((None,) * (width - len(kinds)))
+
+            columns_cells = [
+                [row[i] if i < len(row) else None for row in rows]
+                for i in range(0, len(kinds))
+            ]
+            for i, cells in enumerate(columns_cells):
+                if kinds[i] is None:
+                    kinds[i] = kind_of(cells)
+
+            columns = [
+                to_column(kind, i, cells)
+                for i, (kind, cells) in enumerate(zip(kinds, columns_cells))
+            ]
+            return \
+                pa.RecordBatch.from_arrays(columns, names=[str(i) for i in range(0, len(columns))]) if pa is not None else \
+                tuple(columns)
 
-        def parse_time(cell_element):
-            value = cell_element.attrib[f'{ns_office}time-value']
-            try:
-                time_dict = time_regex.match(value).groupdict(0)
-            except AttributeError as e:
-                raise InvalidTimeValueError(value) from e
-
-            return Time(
-                time_dict.get('sign') or '+',
-                int(time_dict.get('years', '0')),
-                int(time_dict.get('months', '0')),
-                int(time_dict.get('days', '0')),
-                int(time_dict.get('hours', '0')),
-                int(time_dict.get('minutes', '0')),
-                Decimal(time_dict.get('seconds', '0')),
-            )
+        return to_batch
 
-        def clear_mem(event, element):
-            if event == 'end':
-                element.clear()
-                while element.getprevious() is not None:
-                    del element.getparent()[0]
+    return sheet_batch_converter
+
+
+class StreamODSParser:
+    # The push-style counterpart of stream_read_ods: rather than pulling from an iterable, bytes of
+    # the ODS file are passed to feed, which returns the (sheet_name, row) pairs that are complete
+
+    def __init__(self, max_string_length=65536, max_columns=65536, max_split_cells=65536, chunk_size=65536):
+        self._unzip_feed, self._unzip_close = _stream_unzip_push(chunk_size)
+        self._num_members = 0
+        self._member_name = None
+        self._mimetype = b''
+        self._found_content_xml = False
+
+        self._xml_parser = etree.XMLPullParser(events=('start', 'end'), resolve_entities=False)
+        self._xml_events = deque()
+        self._xml_closed = False
+        self._num_table_starts = 0
+        self._num_row_or_table_ends = 0
+
+        self._sheets_and_rows = _get_sheets_and_rows(self._buffered_xml_events(), max_string_length, max_columns, max_split_cells)
+        self._sheet_name = None
+        self._rows = None
+
+    def feed(self, chunk):
+        return [(sheet_name, row) for sheet_name, row in self._feed(chunk) if row is not None]
+
+    def close(self):
+        return [(sheet_name, row) for sheet_name, row in self._close() if row is not None]
+
+    # _feed and _close also return a (sheet_name, None) pair at the start of each sheet, so sheets
+    # without rows can be seen by async_stream_read_ods
+
+    def _feed(self, chunk):
+        try:
+            unzipped = self._unzip_feed(chunk)
+        except UnzipValueError as e:
+            raise UnzipError() from e
+        return self._handle_unzipped(unzipped)
+
+    def _close(self):
+        try:
+            unzipped = self._unzip_close()
+        except UnzipValueError as e:
+            raise UnzipError() from e
+        sheets_and_rows = self._handle_unzipped(unzipped)
+
+        if not self._found_content_xml:
+            raise MissingContentXMLError()
+
+        return sheets_and_rows
+
+    def _handle_unzipped(self, unzipped):
+        sheets_and_rows = []
+
+        for name, chunk in unzipped:
+            if self._member_name is None:
+                self._member_name = name
+                self._num_members += 1
+
+            if self._num_members == 1 and name != b'mimetype':
+                raise MissingMIMETypeError()
+
+            if self._num_members == 1 and chunk is not None:
+                self._mimetype += chunk
+
+            if self._num_members == 1 and chunk is None and self._mimetype != _correct_mimetype:
+                raise IncorrectMIMETypeError(self._mimetype.decode("utf-8"))
+
+            if name == b'content.xml' and not self._xml_closed:
+                self._found_content_xml = True
+                self._feed_xml(chunk)
+                sheets_and_rows += self._read_rows()
+
+            if chunk is None:
+                self._member_name = None
 
-        # We use manual iteration to be able to delegate iterating
-        parsed_xml_it = iter(parsed_xml)
+        return sheets_and_rows
+
+    def _feed_xml(self, chunk):
+        ns_table = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+
+        try:
+            if chunk is not None:
+                self._xml_parser.feed(chunk)
+            else:
+                self._xml_parser.close()
+                self._xml_closed = True
+            events = self._xml_parser.read_events()
+            for event, element in events:
+                self._xml_events.append((event, element))
+                self._num_table_starts += event == 'start' and element.tag == f'{ns_table}table'
+                self._num_row_or_table_ends += event == 'end' and element.tag in (f'{ns_table}table-row', f'{ns_table}table')
+        except etree.LxmlError as e:
+            raise InvalidContentXMLError() from e
+
+    def _buffered_xml_events(self):
+        ns_table = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+
+        while self._xml_events or not self._xml_closed:
+            event, element = self._xml_events.popleft()
+            self._num_table_starts -= event == 'start' and element.tag == f'{ns_table}table'
+            self._num_row_or_table_ends -= event == 'end' and element.tag in (f'{ns_table}table-row', f'{ns_table}table')
+            yield event, element
+
+    def _read_rows(self):
+        # The sheets and rows generators pull XML events, so to never leave them waiting on events
+        # that have not yet arrived, each is only advanced if the event that makes it yield or
+        # return is already buffered
+        sheets_and_rows = []
 
         while True:
+            if self._rows is None:
+                if not self._num_table_starts and not self._xml_closed:
+                    break
+                try:
+                    self._sheet_name, self._rows = next(self._sheets_and_rows)
+                except StopIteration:
+                    break
+                sheets_and_rows.append((self._sheet_name, None))
+            else:
+                if not self._num_row_or_table_ends and not self._xml_closed:
+                    break
+                try:
+                    sheets_and_rows.append((self._sheet_name, next(self._rows)))
+                except StopIteration:
+                    self._rows = None
+
+        return sheets_and_rows
+
+
+async def async_stream_read_ods(ods_chunks, executor=None, max_string_length=65536, max_columns=65536, max_split_cells=65536, chunk_size=65536):
+    # The asyncio counterpart of stream_read_ods, taking an async iterable of bytes, and returning
+    # an async iterable of (sheet_name, rows) pairs, where each rows is also an async iterable
+
+    loop = asyncio.get_running_loop()
+    parser = StreamODSParser(max_string_length=max_string_length, max_columns=max_columns, max_split_cells=max_split_cells, chunk_size=chunk_size)
+
+    async def parse(func, *args):
+        # Parsing is run in batches of at most chunk_size bytes of the ODS file: if there is no
+        # executor then each is run in the event loop, yielding to other tasks between them
+        if executor is not None:
+            return await loop.run_in_executor(executor, func, *args)
+        sheets_and_rows = func(*args)
+        await asyncio.sleep(0)
+        return sheets_and_rows
+
+    async def sheets_and_rows():
+        async for chunk in ods_chunks:
+            for i in range(0, len(chunk), chunk_size):
+                for sheet_name, row in await parse(parser._feed, chunk[i:i + chunk_size]):
+                    yield sheet_name, row
+        for sheet_name, row in await parse(parser._close):
+            yield sheet_name, row
+
+    sheets_and_rows_it = sheets_and_rows().__aiter__()
+    next_sheet_name = None
+
+    async def table_rows():
+        nonlocal next_sheet_name
+        async for sheet_name, row in sheets_and_rows_it:
+            if row is None:
+                next_sheet_name = sheet_name
+                break
+            yield row
+
+    async for next_sheet_name, _ in sheets_and_rows_it:
+        break
+
+    while next_sheet_name is not None:
+        sheet_name, next_sheet_name = next_sheet_name, None
+        rows = table_rows()
+        yield sheet_name, rows
+        async for _ in rows:
+            raise UnfinishedIterationError()
+
+
+def stream_read_ods_many(sources, workers=None, ordered=True, batch_size=1024, return_exceptions=False, **kwargs):
+    # Reads each of the sources in a pool of worker processes, yielding (source, sheet_name, rows)
+    # triples where rows is a list of up to batch_size rows. Each source is a path, a bytes
+    # instance, or a picklable callable that returns an iterable of bytes, and the kwargs are passed
+    # to stream_read_ods. Each worker reads one source at a time, and blocks once its pipe is full
+    # until the batches in it are consumed, so a slow consumer doesn't result in unbounded memory
+    # use. If ordered, the batches of each source are yielded after all those of previous sources,
+    # and otherwise in the order they are ready
+
+    context = multiprocessing.get_context()
+    workers = workers if workers is not None else os.cpu_count() or 1
+    sources_it = enumerate(sources)
+    sources_exhausted = False
+    processes = []
+    idle_conns = []
+    running = {}
+
+    def start_sources():
+        nonlocal sources_exhausted
+        while idle_conns and not sources_exhausted:
             try:
-                event, element = _next(parsed_xml_it)
+                index, source = next(sources_it)
             except StopIteration:
+                sources_exhausted = True
                 break
+            conn = idle_conns.pop()
+            conn.send((index, source))
+            running[index] = (conn, source)
 
-            # Starting a table
-            if event == 'start' and f'{ns_table}table' == element.tag:
-                sheet_name = element.attrib[f'{ns_table}name']
-                rows = table_rows(parsed_xml_it)
-                yield sheet_name, rows
-                for _ in rows:
-                    raise UnfinishedIterationError()
+    try:
+        for _ in range(0, workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_stream_read_ods_many_worker, args=(child_conn, batch_size, kwargs), daemon=True)
+            process.start()
+            child_conn.close()
+            processes.append(process)
+            idle_conns.append(parent_conn)
+
+        start_sources()
+        while running:
+            # Sources are started in order, so the lowest index still running is the next in order
+            conns = \
+                [running[min(running)][0]] if ordered else \
+                [conn for conn, _ in running.values()]
+
+            for conn in multiprocessing.connection.wait(conns):
+                index, kind, payload = conn.recv()
+                source = running[index][1]
+
+                if kind == 'rows':
+                    sheet_name, rows = payload
+                    yield source, sheet_name, rows
+                    continue
+
+                del running[index]
+                idle_conns.append(conn)
+                start_sources()
+
+                if kind == 'error' and return_exceptions:
+                    yield source, None, payload
+                elif kind == 'error':
+                    payload.source = source
+                    raise payload
+    finally:
+        # Workers can be blocked sending batches that will now never be received
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def _stream_read_ods_many_worker(conn, batch_size, kwargs):
+
+    def ods_chunks(source):
+        if isinstance(source, bytes):
+            yield source
+        elif callable(source):
+            yield from source()
+        else:
+            with open(source, 'rb') as f:
+                while True:
+                    chunk = f.read(65536)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        index, source = task
+
+        try:
+            for sheet_name, rows in stream_read_ods(ods_chunks(source), **kwargs):
+                # Each sheet results in at least one batch, even if it has no rows
+                batch = list(islice(rows, batch_size))
+                conn.send((index, 'rows', (sheet_name, batch)))
+                while len(batch) == batch_size:
+                    batch = list(islice(rows, batch_size))
+                    if batch:
+                        conn.send((index, 'rows', (sheet_name, batch)))
+        except Exception as e:
+            try:
+                conn.send((index, 'error', e))
+            except Exception:
+                # The exception could not be pickled
+                conn.send((index, 'error', StreamReadODSError(repr(e))))
+        else:
+            conn.send((index, 'done', None))
+
+
+def _stream_unzip_push(chunk_size):
+    # A push-style counterpart of stream-unzip, supporting only what is used in ODS files: stored
+    # or deflated members, with or without data descriptors or Zip64 sizes. Returns a function that
+    # takes bytes of the ZIP file and returns the (member_name, chunk) pairs that can be extracted
+    # from them so far, with a chunk of None marking the end of a member, and a function to call
+    # when there are no more bytes. Errors are the exceptions of stream-unzip
+
+    dd_optional_signature = b'PK\x07\x08'
+    unsigned_long = Struct('<I')
+    dd_sizes_32 = Struct('<II')
+    dd_sizes_64 = Struct('<QQ')
+
+    # The bytes not yet taken are from offset onwards in buf, so taking them doesn't copy the rest,
+    # and buf is only compacted when more bytes are fed
+    buf = b''
+    offset = 0
+    closed = False
+    unzipped = []
+
+    # Each of the below are generators that yield when they need more bytes
+
+    def get_num(num):
+        nonlocal offset
+        while len(buf) - offset < num:
+            if closed:
+                raise TruncatedDataError()
+            yield
+        value = buf[offset:offset + num]
+        offset += num
+        return value
+
+    def get_up_to(num=None):
+        nonlocal offset
+        while len(buf) == offset:
+            if closed:
+                raise TruncatedDataError()
+            yield
+        num = len(buf) - offset if num is None else min(num, len(buf) - offset)
+        value = buf[offset:offset + num]
+        offset += num
+        return value
+
+    def member():
+        nonlocal offset
+
+        version, flags, compression, mod_time, mod_date, crc_32_expected, compressed_size, uncompressed_size, file_name_len, extra_field_len = \
+            _local_file_header_struct.unpack((yield from get_num(_local_file_header_struct.size)))
+
+        if flags & _unsupported_flags:
+            raise UnsupportedFlagsError(flags)
+
+        if compression not in (0, 8):
+            raise UnsupportedCompressionTypeError(compression)
+
+        file_name = yield from get_num(file_name_len)
+        extra = dict(_parse_extra((yield from get_num(extra_field_len))))
+        has_data_descriptor = flags & 0b1000
+        zip64_extra = extra.get(_zip64_size_signature, b'') \
+            if compressed_size == _zip64_value and uncompressed_size == _zip64_value else \
+            b''
+        is_sure_zip64 = len(zip64_extra) >= 16
+        if is_sure_zip64:
+            uncompressed_size, compressed_size = dd_sizes_64.unpack(zip64_extra[:16])
+
+        if has_data_descriptor and compression == 0 and compressed_size == 0:
+            raise NotStreamUnzippable(file_name)
+
+        crc_32_actual = zlib.crc32(b'')
+        num_compressed = 0
+        num_uncompressed = 0
+
+        def output(chunk):
+            nonlocal crc_32_actual, num_uncompressed
+            crc_32_actual = zlib.crc32(chunk, crc_32_actual)
+            num_uncompressed += len(chunk)
+            unzipped.append((file_name, chunk))
+
+        if compression == 0:
+            while num_compressed < compressed_size:
+                chunk = yield from get_up_to(min(chunk_size, compressed_size - num_compressed))
+                num_compressed += len(chunk)
+                output(chunk)
+        else:
+            dobj = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+            while not dobj.eof:
+                compressed_chunk = yield from get_up_to()
+                num_compressed += len(compressed_chunk)
+                while compressed_chunk and not dobj.eof:
+                    try:
+                        chunk = dobj.decompress(compressed_chunk, chunk_size)
+                    except zlib.error as e:
+                        raise DeflateError() from e
+                    if chunk:
+                        output(chunk)
+                    compressed_chunk = dobj.unconsumed_tail
+            # The unused data is the end of what was last taken, with nothing fed since
+            num_compressed -= len(dobj.unused_data)
+            offset -= len(dobj.unused_data)
+
+        if has_data_descriptor:
+            crc_32_expected = yield from get_num(4)
+            if crc_32_expected == dd_optional_signature:
+                crc_32_expected = yield from get_num(4)
+            crc_32_expected, = unsigned_long.unpack(crc_32_expected)
+
+            # The sizes in the data descriptor are either 32 or 64 bit, which is not known for sure
+            # unless the local header has Zip64 sizes, so 64 bit is tried only if 32 bit doesn't match
+            must_treat_as_zip64 = is_sure_zip64 or num_compressed > 0xFFFFFFFF or num_uncompressed > 0xFFFFFFFF
+            sizes = yield from get_num(dd_sizes_32.size)
+            compressed_size, uncompressed_size = dd_sizes_32.unpack(sizes)
+            if must_treat_as_zip64 or (compressed_size, uncompressed_size) != (num_compressed, num_uncompressed):
+                sizes += yield from get_num(dd_sizes_64.size - dd_sizes_32.size)
+                compressed_size, uncompressed_size = dd_sizes_64.unpack(sizes)
+
+        if crc_32_expected != crc_32_actual:
+            raise CRC32IntegrityError()
+
+        if compressed_size != num_compressed:
+            raise CompressedSizeIntegrityError()
+
+        if uncompressed_size != num_uncompressed:
+            raise UncompressedSizeIntegrityError()
+
+        unzipped.append((file_name, None))
+
+    def all():
+        nonlocal buf, offset
 
-            clear_mem(event, element)
+        while True:
+            signature = yield from get_num(len(_local_file_header_signature))
+            if signature == _local_file_header_signature:
+                yield from member()
+            elif signature in (_central_directory_signature, _end_of_central_directory_signature):
+                break
+            else:
+                raise UnexpectedSignatureError(signature)
 
-    unzipped_member_files = stream_unzip(ods_chunks, chunk_size=chunk_size)
-    content_xml_chunks = validate_mimetype_and_get_content(unzipped_member_files)
-    content_xml_file_like_obj = to_file_like_obj(content_xml_chunks)
-    content_xml_parsed = etree.iterparse(content_xml_file_like_obj, events=('start', 'end'), resolve_entities=False)
+        # Nothing after the member files is needed
+        while not closed:
+            buf = b''
+            offset = 0
+            yield
 
-    try:
-        yield from get_sheets_and_rows(content_xml_parsed)
-    except UnzipValueError as e:
-        raise UnzipError() from e
+    all_it = all()
+
+    def run():
+        try:
+            next(all_it)
+        except StopIteration:
+            pass
+        unzipped_so_far = unzipped[:]
+        unzipped.clear()
+        return unzipped_so_far
+
+    def feed(chunk):
+        nonlocal buf, offset
+        buf = buf[offset:] + chunk if offset < len(buf) else bytes(chunk)
+        offset = 0
+        return run()
+
+    def close():
+        nonlocal closed
+        closed = True
+        return run()
+
+    return feed, close
 
 
-def simple_table(rows, skip_rows=0):
+# The rows iterators of sheets that are closed to skip the rest of the sheet
+_closable_rows = weakref.WeakSet()
+
+
+def simple_table(rows, skip_rows=0, max_rows=None):
 
     def up_to_first_none(values):
         vals = []
@@ -339,14 +1937,20 @@ def simple_table(rows, skip_rows=0):
         return tuple(vals)
 
     def remaining_rows(width):
-        for row in rows:
+        for row in islice(rows, max_rows):
             remaining = max(0, width - len(row))
             row = row[:width] + (None,) * remaining
             if all((val is None) for val in row):
                 break
             yield row
-        for _ in rows:
-            pass
+
+        # The rows of stream_read_ods can be closed to skip the rest of the sheet without
+        # parsing its cells, but other iterators, even if they wrap those rows, have to be exhausted
+        if rows in _closable_rows:
+            rows.close()
+        else:
+            for _ in rows:
+                pass
 
     for i, row in enumerate(rows):
         if i == skip_rows:
@@ -354,6 +1958,296 @@ def simple_table(rows, skip_rows=0):
             return header_row, remaining_rows(width=len(header_row))
 
 
+class CellCache:
+    # A bounded least recently used cache of converted cell values, keyed by the type of the cell
+    # and the string(s) of its value in the XML. Spreadsheets often repeat the same dates, times,
+    # currencies and numbers, and converting these from strings can be much more expensive than a
+    # cache lookup. Strings are not cached, since they don't need converting
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._caches = {}
+
+    @property
+    def hits(self):
+        return sum(cache.cache_info().hits for cache in self._caches.values())
+
+    @property
+    def misses(self):
+        return sum(cache.cache_info().misses for cache in self._caches.values())
+
+    def _cached(self, numeric, parse_value):
+        if self.maxsize == 0:
+            return parse_value
+
+        try:
+            cached_parse_value = self._caches[numeric]
+        except KeyError:
+            cached_parse_value = self._caches[numeric] = lru_cache(maxsize=self.maxsize)(parse_value)
+
+        def parse_value_with_cache(value_type, value):
+            return \
+                value if value_type == 'string' else \
+                cached_parse_value(value_type, value)
+
+        return parse_value_with_cache
+
+
+class ConversionCache:
+    # A size-bounded least recently used cache on disk of the rows of ODS files, keyed by a SHA-256
+    # hash of the bytes of the file and of the arguments that affect the rows. To find the hash,
+    # the file is written to a temporary file in the directory, and only on a miss is it then read
+    # from there and parsed. Entries are gzipped pickles, so the directory must only be writable
+    # by trusted users
+
+    # Changed when the types or format of entries change, so older entries are not used
+    _version = 1
+
+    def __init__(self, directory, max_size=1073741824, batch_size=1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _read(self, ods_chunks, chunk_size, options, read):
+        with tempfile.TemporaryFile(dir=self.directory) as spooled:
+            content_hash = hashlib.sha256()
+            for chunk in ods_chunks:
+                content_hash.update(chunk)
+                spooled.write(chunk)
+            options_hash = hashlib.sha256(repr((self._version, options)).encode())
+            path = os.path.join(self.directory, f'{content_hash.hexdigest()}-{options_hash.hexdigest()[:32]}.rows')
+
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                self.misses += 1
+                spooled.seek(0)
+                yield from self._read_and_write(read(iter(partial(spooled.read, chunk_size), b'')), path)
+            else:
+                self.hits += 1
+                with f:
+                    os.utime(path)
+                    yield from self._replay(f)
+
+    def _replay(self, f):
+        def records():
+            with gzip.GzipFile(fileobj=f, mode='rb') as g:
+                while True:
+                    try:
+                        yield pickle.load(g)
+                    except EOFError:
+                        break
+
+        for (_, sheet_name), sheet_records in groupby(records(), key=lambda record: record[:2]):
+            rows = (row for _, _, rows_in_batch in sheet_records for row in rows_in_batch)
+            yield sheet_name, rows
+            for _ in rows:
+                raise UnfinishedIterationError()
+
+    def _read_and_write(self, sheets_and_rows, path):
+        # Each record is a batch of rows of a sheet, with the index and name of the sheet. The
+        # entry is only moved into place if all the rows of all the sheets have been written
+        complete = True
+
+        def written_rows(write, sheet_index, sheet_name, rows):
+            nonlocal complete
+            rows_in_batch = []
+            finished = False
+            try:
+                for row in rows:
+                    rows_in_batch.append(row)
+                    if len(rows_in_batch) == self.batch_size:
+                        write((sheet_index, sheet_name, rows_in_batch))
+                        rows_in_batch = []
+                    yield row
+                finished = True
+            finally:
+                if finished:
+                    write((sheet_index, sheet_name, rows_in_batch))
+                else:
+                    complete = False
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=1) as g:
+                    write = partial(pickle.dump, file=g, protocol=pickle.HIGHEST_PROTOCOL)
+                    for sheet_index, (sheet_name, rows) in enumerate(sheets_and_rows):
+                        rows = written_rows(write, sheet_index, sheet_name, rows)
+                        yield sheet_name, rows
+                        for _ in rows:
+                            raise UnfinishedIterationError()
+            if complete:
+                os.replace(temp_path, path)
+                self._evict()
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.rows'):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, name in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            size -= entry_size
+
+
+class Stats:
+    # Counts and timings of each stage of reading, updated as it happens. The time of each stage
+    # excludes the time of the stages it calls, and the time outside of stream_read_ods is not
+    # counted. If progress is passed, it's called with the Stats instance at most every
+    # progress_interval seconds, as rows are returned and as chunks of the ODS file are read
+
+    def __init__(self, progress=None, progress_interval=1.0, ods_size=None):
+        self.ods_size = ods_size
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.xml_events = 0
+        self.rows = 0
+        self.cells = Counter()
+        self.covered_cells = 0
+        self.seconds = {
+            'source': 0.0,
+            'unzip': 0.0,
+            'xml': 0.0,
+            'rows': 0.0,
+            'convert': 0.0,
+        }
+        self._progress = progress
+        self._progress_interval = progress_interval
+        self._progress_at = perf_counter()
+        self._stage = None
+        self._stage_start = perf_counter()
+
+    @property
+    def skipped_bytes(self):
+        # The bytes of the ODS file that were not read, if its size is known
+        return self.ods_size - self.compressed_bytes if self.ods_size is not None else None
+
+    def _switch(self, stage):
+        now = perf_counter()
+        if self._stage is not None:
+            self.seconds[self._stage] += now - self._stage_start
+        self._stage_start = now
+        previous_stage = self._stage
+        self._stage = stage
+        return previous_stage
+
+    def _timed(self, iterable, stage, on_item=None):
+        it = iter(iterable)
+        while True:
+            previous_stage = self._switch(stage)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._switch(previous_stage)
+            if on_item is not None:
+                on_item(item)
+            yield item
+
+    def _timed_function(self, func, stage):
+        def timed(*args):
+            previous_stage = self._switch(stage)
+            try:
+                return func(*args)
+            finally:
+                self._switch(previous_stage)
+        return timed
+
+    def _count_compressed(self, chunk):
+        self.compressed_bytes += len(chunk)
+        self._maybe_progress()
+
+    def _counted_read_range(self, read_range):
+        def counted(offset, length):
+            data = read_range(offset, length)
+            self._count_compressed(data)
+            return data
+        return counted
+
+    def _count_decompressed(self, chunk):
+        self.decompressed_bytes += len(chunk)
+
+    def _count_row(self, row):
+        self.rows += 1
+        self._maybe_progress()
+
+    def _maybe_progress(self):
+        if self._progress is not None and self._stage_start - self._progress_at >= self._progress_interval:
+            self._progress_at = self._stage_start
+            self._progress(self)
+
+
+class LazyRow(Sequence):
+    # A row from stream_read_ods with lazy=True. It behaves as a tuple of the values of its cells,
+    # but each value is only converted from its strings in the XML the first time it's accessed.
+    # Which cells have been converted is a flag per cell, since a converted value can itself be a
+    # tuple, and in a bytearray so that setting one doesn't copy the others
+    __slots__ = ('_cells', '_parse_value', '_converted')
+
+    def __init__(self, cells, parse_value):
+        self._cells = list(cells)
+        self._parse_value = parse_value
+        self._converted = bytearray(len(self._cells))
+
+    def _value(self, i):
+        if not self._converted[i]:
+            cell = self._cells[i]
+            if cell is not None:
+                self._cells[i] = self._parse_value(*cell)
+            self._converted[i] = 1
+        return self._cells[i]
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._value(i) for i in range(*index.indices(len(self._cells))))
+        if index < 0:
+            index += len(self._cells)
+        if not 0 <= index < len(self._cells):
+            raise IndexError('LazyRow index out of range')
+        return self._value(index)
+
+    def __iter__(self):
+        for i in range(0, len(self._cells)):
+            yield self._value(i)
+
+    def __eq__(self, other):
+        return \
+            tuple(self) == tuple(other) if isinstance(other, (tuple, LazyRow)) else \
+            NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f'LazyRow({tuple(self)!r})'
+
+    def __reduce__(self):
+        # So it can be pickled, for example by stream_read_ods_many, as the tuple it behaves as
+        return (tuple, (tuple(self),))
+
+
 class Percentage(Decimal):
     pass
 
@@ -364,6 +2258,10 @@ class Currency(Decimal):
         instance.code = code
         return instance
 
+    def __reduce__(self):
+        # So the code is preserved when pickled, for example by stream_read_ods_many
+        return (self.__class__, (str(self), None, self.code))
+
     def __eq__(self, other):
         return \
             isinstance(other, self.__class__) \
@@ -371,6 +2269,10 @@ class Currency(Decimal):
             and self.code == other.code
 
 
+DictionaryColumn = namedtuple('DictionaryColumn', ('codes', 'dictionary'))
+
+SheetScan = namedtuple('SheetScan', ('name', 'num_rows', 'num_non_empty_rows', 'num_columns', 'num_merged_cells', 'complete'))
+
 Time = namedtuple('Time', ('sign', 'years', 'months', 'days', 'hours', 'minutes', 'seconds'), defaults=('+', 0, 0, 0, 0, Decimal('0')))
 
 
@@ -386,6 +2288,14 @@ class UnfinishedIterationError(InvalidOperationError):
     pass
 
 
+class ColumnNotFoundError(InvalidOperationError):
+    pass
+
+
+class SchemaMismatchError(InvalidOperationError):
+    pass
+
+
 class InvalidODSFileError(StreamReadODSError, ValueError):
     pass
 
@@ -426,6 +2336,10 @@ class InvalidBooleanValueError(InvalidValueError):
     pass
 
 
+class InvalidCurrencyValueError(InvalidValueError):
+    pass
+
+
 class InvalidDateValueError(InvalidValueError):
     pass
 
@@ -454,5 +2368,13 @@ class TooManySplitCells(StreamReadODSError):
     pass
 
 
+class TooManyRepeatedRowsError(StreamReadODSError):
+    pass
+
+
 class StringTooLongError(StreamReadODSError):
     pass
+
+
+class SpoolTooLargeError(StreamReadODSError):
+    pass
@@ -1,5 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import date, datetime
 from decimal import Decimal
+from itertools import islice
+import asyncio
+import io
+import os
+import pickle
+import threading
+import time
 import pytest
 from stream_write_ods import stream_write_ods
 
@@ -18,8 +27,27 @@ from stream_read_ods import (
     StringTooLongError,
     stream_read_ods,
     simple_table,
+    StreamODSParser,
+    async_stream_read_ods,
+    stream_read_ods_columnar,
+    InvalidFloatValueError,
+    ColumnNotFoundError,
+    CellCache,
+    TooManyRepeatedRowsError,
+    Stats,
+    stream_read_ods_many,
+    InvalidODSXMLError,
+    stream_read_ods_random_access,
+    scan_ods,
+    SheetScan,
+    ConversionCache,
+    LazyRow,
+    SchemaMismatchError,
+    SpoolTooLargeError,
+    DictionaryColumn,
 )
-from stream_zip import ZIP_32, NO_COMPRESSION_32, stream_zip
+from stream_unzip import UnexpectedSignatureError
+from stream_zip import ZIP_32, ZIP_64, NO_COMPRESSION_32, stream_zip
 
 
 def test_stream_write_ods():
@@ -428,3 +456,1643 @@ def test_high_depth():
 
     with pytest.raises(InvalidContentXMLError):
         next(stream_read_ods(stream_zip(unzipped_files())))
+
+
+@pytest.mark.parametrize('fixture', [
+    'excel.ods',
+    'excel-with-styles.ods',
+    'libreoffice.ods',
+    'libreoffice-with-styles.ods',
+    'libreoffice-with-repeated.ods',
+    'libreoffice-with-spanned.ods',
+    'libreoffice-with-row-spanned.ods',
+    'libreoffice-with-row-col-spans-repeated.ods',
+])
+@pytest.mark.parametrize('chunk_size', [1, 10, 65536])
+def test_push_parser(fixture, chunk_size):
+    with open(f'fixtures/{fixture}', 'rb') as f:
+        ods_bytes = f.read()
+
+    parser = StreamODSParser()
+    sheets_and_rows = []
+    for i in range(0, len(ods_bytes), chunk_size):
+        sheets_and_rows.extend(parser.feed(ods_bytes[i:i + chunk_size]))
+    sheets_and_rows.extend(parser.close())
+
+    assert sheets_and_rows == [
+        (name, row)
+        for name, rows in stream_read_ods((ods_bytes,))
+        for row in rows
+    ]
+
+
+def test_push_parser_zip64():
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+
+        def file_1_data():
+            yield b'application/vnd.oasis.opendocument.spreadsheet'
+
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, file_1_data()
+
+        def file_2_data():
+            yield b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            yield b'<table:table table:name="Sheet1"><table:table-row><table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell></table:table-row></table:table>'
+            yield b'</office:document-content>'
+
+        yield 'content.xml', modified_at, perms, ZIP_64, file_2_data()
+
+    parser = StreamODSParser()
+    sheets_and_rows = []
+    for chunk in stream_zip(unzipped_files()):
+        sheets_and_rows.extend(parser.feed(chunk))
+    sheets_and_rows.extend(parser.close())
+
+    assert sheets_and_rows == [('Sheet1', ('A',))]
+
+
+def test_push_parser_large_stored_member():
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, NO_COMPRESSION_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1">'
+            + b'<table:table-row><table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell></table:table-row>' * 20000 +
+            b'</table:table>'
+            b'</office:document-content>',
+        )
+
+    ods_bytes = b''.join(stream_zip(unzipped_files()))
+    parser = StreamODSParser(chunk_size=100)
+    sheets_and_rows = parser.feed(ods_bytes) + parser.close()
+    assert sheets_and_rows == [('Sheet1', ('A',))] * 20000
+
+
+def test_push_parser_errors():
+    parser = StreamODSParser()
+    with pytest.raises(UnzipError):
+        parser.feed(b'Not a zip' * 1000)
+
+    with open('fixtures/doc.odt', 'rb') as f:
+        parser = StreamODSParser()
+        with pytest.raises(IncorrectMIMETypeError):
+            parser.feed(f.read())
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+
+        def file_1_data():
+            yield b'application/vnd.oasis.opendocument.spreadsheet'
+
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, file_1_data()
+
+    parser = StreamODSParser()
+    for chunk in stream_zip(unzipped_files()):
+        parser.feed(chunk)
+    with pytest.raises(MissingContentXMLError):
+        parser.close()
+
+    parser = StreamODSParser()
+    parser.feed(b''.join(stream_zip(unzipped_files()))[:10])
+    with pytest.raises(UnzipError):
+        parser.close()
+
+
+@pytest.mark.parametrize('number_rows_repeated', [b'0', b'-1'])
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+def test_push_parser_invalid_rows_repeated(number_rows_repeated, chunk_size):
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1">'
+            b'<table:table-row table:number-rows-repeated="' + number_rows_repeated + b'"><table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell></table:table-row>'
+            b'<table:table-row><table:table-cell office:value-type="string"><text:p>B</text:p></table:table-cell></table:table-row>'
+            b'</table:table>'
+            b'</office:document-content>',
+        )
+
+    ods_bytes = b''.join(stream_zip(unzipped_files()))
+
+    parser = StreamODSParser()
+    with pytest.raises(InvalidODSXMLError):
+        for i in range(0, len(ods_bytes), chunk_size):
+            parser.feed(ods_bytes[i:i + chunk_size])
+        parser.close()
+
+    with pytest.raises(InvalidODSXMLError):
+        for sheet_name, rows in stream_read_ods((ods_bytes,)):
+            list(rows)
+
+    with pytest.raises(InvalidODSXMLError):
+        list(scan_ods((ods_bytes,)))
+
+
+@pytest.mark.parametrize('cell', [
+    b'<table:table-cell table:number-columns-repeated="-2"/>',
+    b'<table:table-cell table:number-columns-repeated="0"/>',
+    b'<table:covered-table-cell table:number-columns-repeated="-2"/>',
+    b'<table:table-cell office:value-type="string" table:number-columns-spanned="0"><text:p>A</text:p></table:table-cell>',
+    b'<table:table-cell office:value-type="string" table:number-rows-spanned="-1"><text:p>A</text:p></table:table-cell>',
+])
+def test_invalid_columns_repeated_or_spanned(cell):
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row>'
+            + cell +
+            b'<table:table-cell office:value-type="string"><text:p>B</text:p></table:table-cell>'
+            b'</table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+
+    for kwargs in ({}, {'usecols': [0, 1]}):
+        with pytest.raises(InvalidODSXMLError):
+            for sheet_name, rows in stream_read_ods(stream_zip(unzipped_files()), **kwargs):
+                list(rows)
+
+    with pytest.raises(InvalidODSXMLError):
+        list(scan_ods(stream_zip(unzipped_files())))
+
+
+@pytest.mark.parametrize('fixture', [
+    'excel.ods',
+    'libreoffice.ods',
+    'libreoffice-with-row-col-spans-repeated.ods',
+])
+@pytest.mark.parametrize('executor', [None, ThreadPoolExecutor(max_workers=1)])
+def test_async_stream_read_ods(fixture, executor):
+    with open(f'fixtures/{fixture}', 'rb') as f:
+        ods_bytes = f.read()
+
+    async def async_ods_chunks():
+        for i in range(0, len(ods_bytes), 10):
+            yield ods_bytes[i:i + 10]
+
+    async def async_files():
+        files = []
+        async for name, rows in async_stream_read_ods(async_ods_chunks(), executor=executor):
+            files.append((name, [row async for row in rows]))
+        return files
+
+    assert asyncio.run(async_files()) == [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes,))
+    ]
+
+
+def test_async_stream_read_ods_empty_sheet_and_unfinished():
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+
+        def file_1_data():
+            yield b'application/vnd.oasis.opendocument.spreadsheet'
+
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, file_1_data()
+
+        def file_2_data():
+            yield b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            yield b'<table:table table:name="Empty"></table:table>'
+            yield b'<table:table table:name="Sheet2"><table:table-row><table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell></table:table-row></table:table>'
+            yield b'</office:document-content>'
+
+        yield 'content.xml', modified_at, perms, ZIP_32, file_2_data()
+
+    async def async_ods_chunks():
+        for chunk in stream_zip(unzipped_files()):
+            yield chunk
+
+    async def async_files():
+        files = []
+        async for name, rows in async_stream_read_ods(async_ods_chunks()):
+            files.append((name, [row async for row in rows]))
+        return files
+
+    assert asyncio.run(async_files()) == [('Empty', []), ('Sheet2', [('A',)])]
+
+    async def async_unfinished():
+        sheets = async_stream_read_ods(async_ods_chunks())
+        await sheets.__anext__()
+        await sheets.__anext__()
+        with pytest.raises(UnfinishedIterationError):
+            await sheets.__anext__()
+
+    asyncio.run(async_unfinished())
+
+
+def test_columnar_numpy():
+    np = pytest.importorskip('numpy')
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+
+        def file_1_data():
+            yield b'application/vnd.oasis.opendocument.spreadsheet'
+
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, file_1_data()
+
+        def file_2_data():
+            yield b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            yield b'<table:table table:name="Sheet1">'
+            yield b'<table:table-row>'
+            yield b'<table:table-cell office:value-type="float" office:value="1"/>'
+            yield b'<table:table-cell office:value-type="string"><text:p>a</text:p></table:table-cell>'
+            yield b'<table:table-cell office:value-type="boolean" office:boolean-value="true"/>'
+            yield b'<table:table-cell office:value-type="date" office:date-value="2021-01-02"/>'
+            yield b'<table:table-cell office:value-type="float" office:value="1.5"/>'
+            yield b'</table:table-row>'
+            yield b'<table:table-row>'
+            yield b'<table:table-cell office:value-type="currency" office:value="2.5" office:currency="GBP"/>'
+            yield b'<table:table-cell/>'
+            yield b'<table:table-cell office:value-type="boolean" office:boolean-value="false"/>'
+            yield b'<table:table-cell office:value-type="date" office:date-value="2021-01-02T03:04:05.000006"/>'
+            yield b'<table:table-cell office:value-type="string"><text:p>b</text:p></table:table-cell>'
+            yield b'</table:table-row>'
+            yield b'<table:table-row>'
+            yield b'<table:table-cell/>'
+            yield b'<table:table-cell office:value-type="string"><text:p>c</text:p></table:table-cell>'
+            yield b'</table:table-row>'
+            yield b'<table:table-row>'
+            yield b'<table:table-cell office:value-type="float" office:value="3"/>'
+            yield b'</table:table-row>'
+            yield b'</table:table>'
+            yield b'</office:document-content>'
+
+        yield 'content.xml', modified_at, perms, ZIP_32, file_2_data()
+
+    sheets = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_zip(unzipped_files()), batch_size=3, batch_format='numpy')
+    ]
+    assert len(sheets) == 1
+    assert sheets[0][0] == 'Sheet1'
+    assert len(sheets[0][1]) == 2
+
+    batch_1, batch_2 = sheets[0][1]
+    assert batch_1[0].dtype == np.float64
+    assert batch_1[0].tolist() == [1.0, 2.5, None]
+    assert batch_1[1].tolist() == ['a', None, 'c']
+    assert batch_1[2].dtype == np.bool_
+    assert batch_1[2].tolist() == [True, False, None]
+    assert batch_1[3].dtype == np.dtype('datetime64[us]')
+    assert batch_1[3].tolist() == [datetime(2021, 1, 2), datetime(2021, 1, 2, 3, 4, 5, 6), None]
+    assert batch_1[4].dtype == object
+    assert batch_1[4].tolist() == [Decimal('1.5'), 'b', None]
+    assert len(batch_2) == 5
+    assert batch_2[0].tolist() == [3.0]
+    assert [column.dtype for column in batch_2] == [column.dtype for column in batch_1]
+    assert [column.tolist() for column in batch_2[1:]] == [[None]] * 4
+
+
+def test_columnar_arrow():
+    pa = pytest.importorskip('pyarrow')
+
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), ((1,), (2.5,), ('a',), (None,), (3,))
+
+    sheets = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=2, batch_format='arrow')
+    ]
+    assert [(name, [batch.to_pydict() for batch in batches]) for name, batches in sheets] == [
+        ('Sheet 1 name', [{'0': ['col_1_name', '1']}, {'0': ['2.5', 'a']}, {'0': [None, '3']}]),
+    ]
+    assert [batch.schema.types for batch in sheets[0][1]] == [[pa.string()]] * 3
+
+
+def test_columnar_same_schema_for_all_batches():
+    np = pytest.importorskip('numpy')
+    pa = pytest.importorskip('pyarrow')
+
+    def get_sheets():
+        yield 'Sheet 1', ('Number', 'Date', 'Text'), (
+            (i + 0.5, date(2021, 1, 1 + i % 28), f'Text {i}') if i % 3 else (i + 0.5,)
+            for i in range(0, 10)
+        )
+
+    for batch_format in ('arrow', 'numpy'):
+        (name, batches), = [
+            (name, list(batches))
+            for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=4, skip_rows=1, batch_format=batch_format)
+        ]
+        assert len(batches) == 3
+        if batch_format == 'arrow':
+            assert pa.Table.from_batches(batches).schema.types == [pa.float64(), pa.timestamp('us'), pa.string()]
+            assert [batch.schema for batch in batches] == [batches[0].schema] * 3
+        else:
+            assert [[column.dtype for column in batch] for batch in batches] == [[np.dtype('float64'), np.dtype('datetime64[us]'), np.dtype(object)]] * 3
+
+
+def test_columnar_schema_mismatch():
+    pytest.importorskip('numpy')
+
+    def get_sheets(rows):
+        yield 'Sheet 1', ('Number',), rows
+
+    sheet_name, batches = next(stream_read_ods_columnar(stream_write_ods(get_sheets(((1,), ('a',)))), batch_size=1, skip_rows=1, batch_format='numpy'))
+    next(batches)
+    with pytest.raises(SchemaMismatchError):
+        next(batches)
+
+
+
+def test_columnar_columns_added_in_later_batches():
+    np = pytest.importorskip('numpy')
+    pa = pytest.importorskip('pyarrow')
+
+    def get_sheets():
+        yield 'Sheet 1', ('A',), (('x',), ('y', 1.0, 2.0), ('z', None, 3.0))
+
+    (name, batches), = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=2, skip_rows=1, batch_format='numpy')
+    ]
+    assert [[column.dtype for column in batch] for batch in batches] == [
+        [np.dtype(object), np.dtype('float64'), np.dtype('float64')],
+        [np.dtype(object), np.dtype('float64'), np.dtype('float64')],
+    ]
+    assert [[column.tolist() for column in batch] for batch in batches] == [
+        [['x', 'y'], [None, 1.0], [None, 2.0]],
+        [['z'], [None], [3.0]],
+    ]
+
+    (name, batches), = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=1, skip_rows=1, batch_format='arrow')
+    ]
+    assert [batch.schema.types for batch in batches] == [
+        [pa.string()],
+        [pa.string(), pa.float64(), pa.float64()],
+        [pa.string(), pa.float64(), pa.float64()],
+    ]
+    table = pa.concat_tables([pa.Table.from_batches([batch]) for batch in batches], promote_options='default')
+    assert table.to_pydict() == {'0': ['x', 'y', 'z'], '1': [None, 1.0, None], '2': [None, 2.0, 3.0]}
+
+
+def test_columnar_invalid_float():
+    pytest.importorskip('numpy')
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+
+        def file_1_data():
+            yield b'application/vnd.oasis.opendocument.spreadsheet'
+
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, file_1_data()
+
+        def file_2_data():
+            yield b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+            yield b'<table:table table:name="Sheet1"><table:table-row><table:table-cell office:value-type="float" office:value="not-a-float"/></table:table-row></table:table>'
+            yield b'</office:document-content>'
+
+        yield 'content.xml', modified_at, perms, ZIP_32, file_2_data()
+
+    sheet_name, batches = next(stream_read_ods_columnar(stream_zip(unzipped_files()), batch_format='numpy'))
+    with pytest.raises(InvalidFloatValueError) as excinfo:
+        next(batches)
+    assert excinfo.value.args == ('not-a-float',)
+
+
+def test_sheets_selection():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), (('Value 1',),)
+        yield 'Sheet 2 name', ('col_1_name',), (('Value 2',),)
+        yield 'Sheet 3 name', ('col_1_name',), (('Value 3',),)
+
+    def get_files(sheets):
+        return [
+            (name, list(rows))
+            for name, rows in stream_read_ods(stream_write_ods(get_sheets()), sheets=sheets)
+        ]
+
+    assert get_files(None) == [
+        ('Sheet 1 name', [('col_1_name',), ('Value 1',)]),
+        ('Sheet 2 name', [('col_1_name',), ('Value 2',)]),
+        ('Sheet 3 name', [('col_1_name',), ('Value 3',)]),
+    ]
+    assert get_files(('Sheet 2 name',)) == [
+        ('Sheet 2 name', [('col_1_name',), ('Value 2',)]),
+    ]
+    assert get_files((0, 'Sheet 3 name')) == [
+        ('Sheet 1 name', [('col_1_name',), ('Value 1',)]),
+        ('Sheet 3 name', [('col_1_name',), ('Value 3',)]),
+    ]
+    assert get_files(lambda name: name != 'Sheet 1 name') == [
+        ('Sheet 2 name', [('col_1_name',), ('Value 2',)]),
+        ('Sheet 3 name', [('col_1_name',), ('Value 3',)]),
+    ]
+    assert get_files(()) == []
+
+
+def test_sheets_selection_skips_values():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), (('Value A' * 100000,),)
+        yield 'Sheet 2 name', ('col_1_name',), (('Value 2',),)
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), sheets=('Sheet 2 name',))
+    ]
+    assert files == [('Sheet 2 name', [('col_1_name',), ('Value 2',)])]
+
+
+def test_usecols_by_index():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name', 'col_2_name', 'col_3_name'), (
+            ('Value A', 1, True),
+            ('Value B',),
+        )
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), usecols=(2, 0))
+    ]
+    assert files == [('Sheet 1 name', [
+        ('col_3_name', 'col_1_name'),
+        (True, 'Value A'),
+        (None, 'Value B'),
+    ])]
+
+
+def test_usecols_by_name():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name', 'col_2_name', 'col_3_name'), (
+            ('Value A', 1, True),
+        )
+        yield 'Sheet 2 name', ('col_3_name', 'col_1_name'), (
+            (False, 'Value B'),
+        )
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), usecols=('col_3_name', 'col_1_name'))
+    ]
+    assert files == [
+        ('Sheet 1 name', [('col_3_name', 'col_1_name'), (True, 'Value A')]),
+        ('Sheet 2 name', [('col_3_name', 'col_1_name'), (False, 'Value B')]),
+    ]
+
+
+def test_usecols_with_spans_and_repeats():
+    with open('fixtures/libreoffice-with-row-col-spans-repeated.ods', 'rb') as f:
+        ods_bytes = f.read()
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes,), usecols=(1, 6))
+    ]
+    assert files == [('Sheet1', [
+        ('Value', 'After G1'),
+        ('Value', 'After G2'),
+        (None, None)])]
+
+
+def test_usecols_missing_name():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), (('Value A',),)
+
+    sheet_name, rows = next(stream_read_ods(stream_write_ods(get_sheets()), usecols=('col_2_name',)))
+    with pytest.raises(ColumnNotFoundError):
+        next(rows)
+
+
+def test_usecols_skips_values():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name', 'col_2_name'), (('Value A' * 100000, 'Value B'),)
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), usecols=(1,))
+    ]
+    assert files == [('Sheet 1 name', [('col_2_name',), ('Value B',)])]
+
+
+def test_skip_rows_and_max_rows():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), ((f'Value {i}',) for i in range(0, 10))
+        yield 'Sheet 2 name', ('col_1_name',), (('Value A',),)
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), skip_rows=2, max_rows=3)
+    ]
+    assert files == [
+        ('Sheet 1 name', [('Value 1',), ('Value 2',), ('Value 3',)]),
+        ('Sheet 2 name', []),
+    ]
+
+
+def test_skip_rows_with_spans():
+    with open('fixtures/libreoffice-with-row-col-spans-repeated.ods', 'rb') as f:
+        ods_bytes = f.read()
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes,), skip_rows=1)
+    ]
+    assert files == [('Sheet1', [
+        ('Value', 'Value', 'Value', 'Value', 'Value', 'Value', 'After G2'),
+        ('After A3',)])]
+
+
+def test_skip_rows_and_max_rows_skip_values():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), (
+            ('Value A' * 100000,),
+            ('Value B',),
+            ('Value C' * 100000,),
+        )
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), skip_rows=2, max_rows=1)
+    ]
+    assert files == [('Sheet 1 name', [('Value B',)])]
+
+
+def test_max_rows_stops_reading():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), ((f'Value {i}',) for i in range(0, 20000))
+        yield 'Sheet 2 name', ('col_1_name',), (('Value A',),)
+
+    ods_bytes = b''.join(stream_write_ods(get_sheets()))
+    num_chunks_consumed = 0
+
+    def get_ods_chunks():
+        nonlocal num_chunks_consumed
+        for i in range(0, len(ods_bytes), 1000):
+            num_chunks_consumed += 1
+            yield ods_bytes[i:i + 1000]
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(get_ods_chunks(), sheets=(0,), max_rows=2)
+    ]
+    assert files == [('Sheet 1 name', [('col_1_name',), ('Value 0',)])]
+    assert num_chunks_consumed < 10
+
+
+def test_simple_table_max_rows():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), (
+            ('Value A',),
+            ('Value B',),
+            ('Value C' * 100000,),
+        )
+        yield 'Sheet 2 name', ('col_1_name',), (
+            ('Value D',),
+            (None,),
+            ('Value E' * 100000,),
+        )
+
+    tables = []
+    for name, rows in stream_read_ods(stream_write_ods(get_sheets())):
+        columns, table_rows = simple_table(rows, max_rows=2)
+        tables.append((name, columns, list(table_rows)))
+
+    assert tables == [
+        ('Sheet 1 name', ('col_1_name',), [('Value A',), ('Value B',)]),
+        ('Sheet 2 name', ('col_1_name',), [('Value D',)]),
+    ]
+
+
+def test_simple_table_wrapped_rows():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name',), (('Value A',), ('Value B',), ('Value C',))
+        yield 'Sheet 2 name', ('col_1_name',), (('Value D',), ('Value E',))
+
+    # Wrapped rows can't be closed to skip the sheet, so are exhausted
+    tables = []
+    for name, rows in stream_read_ods(stream_write_ods(get_sheets())):
+        columns, table_rows = simple_table((row for row in rows), max_rows=1)
+        tables.append((name, columns, list(table_rows)))
+
+    assert tables == [
+        ('Sheet 1 name', ('col_1_name',), [('Value A',)]),
+        ('Sheet 2 name', ('col_1_name',), [('Value D',)]),
+    ]
+
+
+@pytest.mark.parametrize('numeric,expected_row', [
+    ('decimal', (Decimal('1'), Decimal('4.56'), Percentage('0.5'), Currency('2.34', code='GBP'), Time(sign='+', years=0, months=0, days=0, hours=1, minutes=23, seconds=Decimal('0')))),
+    ('float', (1.0, 4.56, 0.5, 2.34, Time(sign='+', years=0, months=0, days=0, hours=1, minutes=23, seconds=0.0))),
+    ('int_if_integral', (1, 4.56, 0.5, 2.34, Time(sign='+', years=0, months=0, days=0, hours=1, minutes=23, seconds=0))),
+])
+def test_numeric(numeric, expected_row):
+    with open('fixtures/libreoffice.ods', 'rb') as f:
+        ods_bytes = f.read()
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes,), numeric=numeric, usecols=(0, 1, 6, 7, 8))
+    ]
+    assert files == [('Sheet1', [('integer', 'float', 'percentage', 'money', 'time'), expected_row])]
+    assert [type(value) for value in files[0][1][1]] == [type(value) for value in expected_row]
+
+
+@pytest.mark.parametrize('value,expected', [
+    ('12345678901234567891', 12345678901234567891),
+    ('-12345678901234567891', -12345678901234567891),
+    ('12345678901234567891.0', 12345678901234567891),
+    ('1E+20', 100000000000000000000),
+    ('1.00000000000000000001', 1.0),
+    ('4.56', 4.56),
+])
+def test_numeric_int_if_integral_exact(value, expected):
+    def unzipped_files():
+        yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+            b'<office:body><office:spreadsheet><table:table table:name="Sheet1"><table:table-row>'
+            b'<table:table-cell office:value-type="float" office:value="' + value.encode() + b'"/>'
+            b'</table:table-row></table:table></office:spreadsheet></office:body>'
+            b'</office:document-content>',
+        )
+
+    (sheet_name, rows), = [
+        (sheet_name, list(rows))
+        for sheet_name, rows in stream_read_ods(stream_zip(unzipped_files()), numeric='int_if_integral')
+    ]
+    assert rows == [(expected,)]
+    assert type(rows[0][0]) is type(expected)
+
+
+def test_numeric_invalid_float():
+    def unzipped_files():
+        yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+            b'<office:body><office:spreadsheet><table:table table:name="Sheet1"><table:table-row>'
+            b'<table:table-cell office:value-type="float" office:value="not-a-float"/>'
+            b'</table:table-row></table:table></office:spreadsheet></office:body></office:document-content>',
+        )
+
+    sheet_name, rows = next(stream_read_ods(stream_zip(unzipped_files()), numeric='float'))
+    with pytest.raises(InvalidFloatValueError):
+        next(rows)
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods(stream_zip(unzipped_files()), numeric='not-a-mode'))
+
+
+def test_cell_cache():
+    def get_sheets():
+        yield 'Sheet 1 name', ('col_1_name', 'col_2_name'), (
+            (date(2021, 1, 2), 'Value A'),
+            (date(2021, 1, 2), 'Value A'),
+            (date(2021, 1, 3), 'Value A'),
+        )
+
+    expected = [('Sheet 1 name', [
+        ('col_1_name', 'col_2_name'),
+        (date(2021, 1, 2), 'Value A'),
+        (date(2021, 1, 2), 'Value A'),
+        (date(2021, 1, 3), 'Value A'),
+    ])]
+
+    cell_cache = CellCache()
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), cell_cache=cell_cache)
+    ]
+    assert files == expected
+    assert (cell_cache.hits, cell_cache.misses) == (1, 2)
+
+    cell_cache = CellCache(maxsize=0)
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_write_ods(get_sheets()), cell_cache=cell_cache)
+    ]
+    assert files == expected
+    assert (cell_cache.hits, cell_cache.misses) == (0, 0)
+
+
+def test_trailing_empty_repeated_cells():
+    def unzipped_files():
+        yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+            b'<office:body><office:spreadsheet><table:table table:name="Sheet1">'
+            b'<table:table-row>'
+            b'<table:table-cell office:value-type="float" office:value="1"/>'
+            b'<table:table-cell table:number-columns-repeated="2"/>'
+            b'<table:table-cell office:value-type="float" office:value="2" table:number-columns-repeated="2"/>'
+            b'<table:table-cell table:number-columns-repeated="1000000000"/>'
+            b'</table:table-row>'
+            b'<table:table-row>'
+            b'<table:table-cell table:number-columns-repeated="1000000000"/>'
+            b'</table:table-row>'
+            b'</table:table></office:spreadsheet></office:body></office:document-content>',
+        )
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_zip(unzipped_files()), max_columns=5)
+    ]
+    assert files == [('Sheet1', [(Decimal('1'), None, None, Decimal('2'), Decimal('2')), ()])]
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_zip(unzipped_files()), column_runs=True)
+    ]
+    assert files == [('Sheet1', [((Decimal('1'), 1), (None, 2), (Decimal('2'), 2)), ()])]
+
+    sheet_name, rows = next(stream_read_ods(stream_zip(unzipped_files()), max_columns=4))
+    with pytest.raises(TooManyColumnsError):
+        next(rows)
+
+
+def test_column_runs_with_spans():
+    with open('fixtures/libreoffice-with-row-col-spans-repeated.ods', 'rb') as f:
+        ods_bytes = f.read()
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes,), column_runs=True)
+    ]
+    assert files == [('Sheet1', [
+        (('Value', 2), ('Value', 2), ('Value', 2), ('After G1', 1)),
+        (('Value', 2), ('Value', 2), ('Value', 2), ('After G2', 1)),
+        (('After A3', 1),)])]
+
+
+def test_repeated_rows():
+    def get_ods_chunks(rows_xml):
+        def unzipped_files():
+            yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+            yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+                b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+                b'<office:body><office:spreadsheet><table:table table:name="Sheet1">' +
+                rows_xml +
+                b'</table:table></office:spreadsheet></office:body></office:document-content>',
+            )
+        return stream_zip(unzipped_files())
+
+    rows_xml = (
+        b'<table:table-row table:number-rows-repeated="3">'
+        b'<table:table-cell office:value-type="float" office:value="1"/>'
+        b'<table:table-cell office:value-type="float" office:value="2" table:number-rows-spanned="3"/>'
+        b'</table:table-row>'
+        b'<table:table-row table:number-rows-repeated="2"><table:table-cell/></table:table-row>'
+        b'<table:table-row table:number-rows-repeated="2">'
+        b'<table:table-cell office:value-type="float" office:value="3"/>'
+        b'<table:covered-table-cell/>'
+        b'</table:table-row>'
+        b'<table:table-row table:number-rows-repeated="1000000000"><table:table-cell/></table:table-row>'
+    )
+
+    with pytest.raises(InvalidODSXMLError):
+        list(next(stream_read_ods(get_ods_chunks(rows_xml)))[1])
+
+    rows_xml = rows_xml.replace(b' table:number-rows-spanned="3"', b'')
+    rows_xml = rows_xml.replace(b'<table:covered-table-cell/>', b'')
+
+    rows = list(next(stream_read_ods(get_ods_chunks(rows_xml)))[1])
+    assert rows == [
+        (Decimal('1'), Decimal('2')),
+        (Decimal('1'), Decimal('2')),
+        (Decimal('1'), Decimal('2')),
+        (),
+        (),
+        (Decimal('3'),),
+        (Decimal('3'),),
+        (),
+    ]
+    assert rows[0] is rows[1]
+
+    rows = list(next(stream_read_ods(get_ods_chunks(rows_xml), row_runs=True))[1])
+    assert rows == [
+        ((Decimal('1'), Decimal('2')), 3),
+        ((), 1),
+        ((), 1),
+        ((Decimal('3'),), 2),
+        ((), 1),
+    ]
+
+    rows = list(next(stream_read_ods(get_ods_chunks(rows_xml), skip_rows=2, max_rows=4))[1])
+    assert rows == [
+        (Decimal('1'), Decimal('2')),
+        (),
+        (),
+        (Decimal('3'),),
+    ]
+
+    sheet_name, rows = next(stream_read_ods(get_ods_chunks(rows_xml), max_repeated_rows=2))
+    with pytest.raises(TooManyRepeatedRowsError):
+        list(rows)
+
+
+def test_repeated_rows_with_covered_cells():
+    def unzipped_files():
+        yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+            b'<office:body><office:spreadsheet><table:table table:name="Sheet1">'
+            b'<table:table-row>'
+            b'<table:table-cell office:value-type="float" office:value="1" table:number-rows-spanned="3"/>'
+            b'</table:table-row>'
+            b'<table:table-row table:number-rows-repeated="2"><table:covered-table-cell/></table:table-row>'
+            b'<table:table-row><table:table-cell office:value-type="float" office:value="2"/></table:table-row>'
+            b'</table:table></office:spreadsheet></office:body></office:document-content>',
+        )
+
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods(stream_zip(unzipped_files()))
+    ]
+    assert files == [('Sheet1', [(Decimal('1'),), (Decimal('1'),), (Decimal('1'),), (Decimal('2'),)])]
+
+
+def test_merged_cells_evicted():
+    def get_ods_chunks(num_row_spans, max_split_cells):
+        def unzipped_files():
+            yield 'mimetype', datetime.now(), 0o600, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+            yield 'content.xml', datetime.now(), 0o600, ZIP_32, (
+                b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+                b'<office:body><office:spreadsheet><table:table table:name="Sheet1">',
+                *(
+                    b'<table:table-row>'
+                    b'<table:table-cell office:value-type="float" office:value="%d" table:number-columns-spanned="2" table:number-rows-spanned="%d"/>'
+                    b'<table:covered-table-cell/>'
+                    b'</table:table-row>' % (i, num_row_spans) +
+                    b'<table:table-row><table:covered-table-cell table:number-columns-repeated="2"/></table:table-row>' * (num_row_spans - 1)
+                    for i in range(0, 100)
+                ),
+                b'</table:table></office:spreadsheet></office:body></office:document-content>',
+            )
+        return stream_read_ods(stream_zip(unzipped_files()), max_split_cells=max_split_cells)
+
+    rows = list(next(get_ods_chunks(num_row_spans=2, max_split_cells=3))[1])
+    assert len(rows) == 200
+    assert rows[-1] == (Decimal('99'), Decimal('99'))
+
+    rows = list(next(get_ods_chunks(num_row_spans=100, max_split_cells=199))[1])
+    assert len(rows) == 10000
+    assert rows[-1] == (Decimal('99'), Decimal('99'))
+
+    sheet_name, rows = next(get_ods_chunks(num_row_spans=100, max_split_cells=198))
+    with pytest.raises(TooManySplitCells):
+        next(rows)
+
+
+def test_stats():
+    with open('fixtures/libreoffice-with-row-col-spans-repeated.ods', 'rb') as f:
+        ods_bytes = f.read()
+
+    progress_calls = []
+    stats = Stats(progress=progress_calls.append, progress_interval=0)
+    files = [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes[:1000], ods_bytes[1000:]), stats=stats)
+    ]
+    assert files == [
+        (name, list(rows))
+        for name, rows in stream_read_ods((ods_bytes,))
+    ]
+    assert stats.compressed_bytes == len(ods_bytes)
+    assert stats.decompressed_bytes > 0
+    assert stats.xml_events > 0
+    assert stats.rows == 3
+    assert stats.cells == {'string': 6}
+    assert stats.covered_cells == 9
+    assert set(stats.seconds) == {'source', 'unzip', 'xml', 'rows', 'convert'}
+    assert all(seconds > 0 for seconds in stats.seconds.values())
+    assert progress_calls and all(progress_call is stats for progress_call in progress_calls)
+
+
+def read_fixture_chunks(fixture):
+    with open(f'fixtures/{fixture}', 'rb') as f:
+        yield from iter(partial(f.read, 100), b'')
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_stream_read_ods_many(ordered):
+    fixtures = [
+        'excel.ods',
+        'libreoffice.ods',
+        'libreoffice-with-row-col-spans-repeated.ods',
+        'libreoffice-with-styles.ods',
+    ]
+    with open('fixtures/excel-with-styles.ods', 'rb') as f:
+        excel_with_styles_bytes = f.read()
+    sources = [f'fixtures/{fixture}' for fixture in fixtures] + [
+        excel_with_styles_bytes,
+        partial(read_fixture_chunks, 'libreoffice-with-spanned.ods'),
+    ]
+
+    def rows_of(source):
+        return [
+            (sheet_name, row)
+            for sheet_name, rows in stream_read_ods(read_fixture_chunks(source[len('fixtures/'):]) if isinstance(source, str) else source() if callable(source) else (source,))
+            for row in rows
+        ]
+
+    batches = list(stream_read_ods_many(sources, workers=3, ordered=ordered, batch_size=1))
+    assert all(len(rows) == 1 for _, _, rows in batches)
+    if ordered:
+        assert [source for source, _, _ in batches] == [
+            source
+            for source in sources
+            for _ in rows_of(source)
+        ]
+    for source in sources:
+        assert [
+            (sheet_name, row)
+            for batch_source, sheet_name, rows in batches
+            if batch_source is source
+            for row in rows
+        ] == rows_of(source)
+
+
+def test_stream_read_ods_many_exceptions():
+    sources = ['fixtures/libreoffice.ods', 'fixtures/doc.odt', 'fixtures/excel.ods']
+
+    batches = list(stream_read_ods_many(sources, workers=2, return_exceptions=True))
+    assert [(source, sheet_name) for source, sheet_name, _ in batches] == [
+        ('fixtures/libreoffice.ods', 'Sheet1'),
+        ('fixtures/doc.odt', None),
+        ('fixtures/excel.ods', 'First'),
+        ('fixtures/excel.ods', 'Second'),
+    ]
+    assert isinstance(batches[1][2], IncorrectMIMETypeError)
+
+    with pytest.raises(IncorrectMIMETypeError) as exc_info:
+        list(stream_read_ods_many(sources, workers=2))
+    assert exc_info.value.source == 'fixtures/doc.odt'
+
+
+def test_stream_read_ods_many_currency_and_early_exit():
+    batches = stream_read_ods_many(['fixtures/excel-with-styles.ods'] * 10, workers=2, usecols=(0,))
+    source, sheet_name, rows = next(batches)
+    assert rows[0] == ('Fist line\nSecondline\n\nFinal line initalic',)
+    batches.close()
+
+    batches = list(stream_read_ods_many(['fixtures/libreoffice.ods'], workers=1))
+    assert batches[0][2][1][7] == Currency('2.34', code='GBP')
+
+
+@pytest.mark.parametrize('fixture', [
+    'excel.ods',
+    'excel-with-styles.ods',
+    'libreoffice.ods',
+    'libreoffice-with-row-col-spans-repeated.ods',
+    'libreoffice-with-styles.ods',
+])
+def test_random_access(fixture):
+    with open(f'fixtures/{fixture}', 'rb') as f:
+        ods_bytes = f.read()
+
+    expected = [(sheet_name, list(rows)) for sheet_name, rows in stream_read_ods((ods_bytes,))]
+
+    with open(f'fixtures/{fixture}', 'rb') as f:
+        assert [(sheet_name, list(rows)) for sheet_name, rows in stream_read_ods_random_access(f, chunk_size=100)] == expected
+
+    def read_range(offset, length):
+        return ods_bytes[offset:offset + length]
+
+    assert [(sheet_name, list(rows)) for sheet_name, rows in stream_read_ods_random_access(read_range, size=len(ods_bytes))] == expected
+
+
+def test_random_access_skips_other_members():
+    image = os.urandom(1000000)
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'Pictures/image.png', modified_at, perms, ZIP_64, (image,)
+        yield 'content.xml', modified_at, perms, ZIP_64, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row><table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell></table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+        yield 'styles.xml', modified_at, perms, ZIP_32, (image,)
+
+    ods_bytes = b''.join(stream_zip(unzipped_files()))
+    ranges = []
+
+    def read_range(offset, length):
+        ranges.append((offset, length))
+        return ods_bytes[offset:offset + length]
+
+    stats = Stats()
+    assert [
+        (sheet_name, list(rows))
+        for sheet_name, rows in stream_read_ods_random_access(read_range, size=len(ods_bytes), stats=stats)
+    ] == [('Sheet1', [('A',)])]
+    assert sum(length for _, length in ranges) < 100000
+    assert stats.compressed_bytes == sum(length for _, length in ranges)
+
+
+def test_random_access_errors():
+    content_xml = \
+        b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">' \
+        b'<table:table table:name="Sheet1"><table:table-row><table:table-cell office:value-type="string"><text:p>ABC</text:p></table:table-cell></table:table-row></table:table>' \
+        b'</office:document-content>'
+
+    def unzipped_files(mimetype, content_xml):
+        modified_at = datetime.now()
+        perms = 0o600
+        if mimetype is not None:
+            yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (mimetype,)
+        yield 'my-file-1.txt', modified_at, perms, NO_COMPRESSION_32, (b'Some bytes 1',)
+        if content_xml is not None:
+            yield 'content.xml', modified_at, perms, NO_COMPRESSION_32, (content_xml,)
+
+    def read(ods_bytes):
+        return [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods_random_access(io.BytesIO(ods_bytes))
+        ]
+
+    with pytest.raises(MissingMIMETypeError):
+        read(b''.join(stream_zip(unzipped_files(None, content_xml))))
+
+    with pytest.raises(IncorrectMIMETypeError):
+        read(b''.join(stream_zip(unzipped_files(b'application/vnd.oasis.opendocument.spreadsheetXX', content_xml))))
+
+    with pytest.raises(MissingContentXMLError):
+        read(b''.join(stream_zip(unzipped_files(b'application/vnd.oasis.opendocument.spreadsheet', None))))
+
+    with pytest.raises(InvalidContentXMLError):
+        read(b''.join(stream_zip(unzipped_files(b'application/vnd.oasis.opendocument.spreadsheet', b'Not XML'))))
+
+    ods_bytes = b''.join(stream_zip(unzipped_files(b'application/vnd.oasis.opendocument.spreadsheet', content_xml)))
+    assert read(ods_bytes.replace(b'Some bytes 1', b'Some bytes 2')) == [('Sheet1', [('ABC',)])]
+
+    with pytest.raises(UnzipError):
+        read(ods_bytes.replace(b'ABC', b'ABD'))
+
+    with pytest.raises(UnzipError):
+        read(ods_bytes[:-10])
+
+    with pytest.raises(UnzipError):
+        read(b'Not a zip' * 1000)
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods_random_access(lambda offset, length: b''))
+
+
+def test_stop_after_content_xml():
+    image = os.urandom(1000000)
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row><table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell></table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+        yield 'Pictures/image.png', modified_at, perms, ZIP_32, (image,)
+
+    ods_bytes = b''.join(stream_zip(unzipped_files()))
+    closed = False
+
+    def get_ods_chunks():
+        nonlocal closed
+        try:
+            for i in range(0, len(ods_bytes), 1000):
+                yield ods_bytes[i:i + 1000]
+        finally:
+            closed = True
+
+    stats = Stats(ods_size=len(ods_bytes))
+    assert [
+        (sheet_name, list(rows))
+        for sheet_name, rows in stream_read_ods(get_ods_chunks(), stats=stats, stop_after_content_xml=True)
+    ] == [('Sheet1', [('A',)])]
+    assert closed
+    assert stats.compressed_bytes < 100000
+    assert stats.skipped_bytes == len(ods_bytes) - stats.compressed_bytes
+
+    closed = False
+    stats = Stats()
+    for sheet_name, rows in stream_read_ods(get_ods_chunks(), stats=stats):
+        list(rows)
+    assert closed
+    assert stats.compressed_bytes == len(ods_bytes)
+    assert stats.skipped_bytes is None
+
+
+@pytest.mark.parametrize('fixture', [
+    'excel.ods',
+    'excel-with-styles.ods',
+    'libreoffice.ods',
+    'libreoffice-with-styles.ods',
+    'libreoffice-with-repeated.ods',
+    'libreoffice-with-spanned.ods',
+    'libreoffice-with-row-spanned.ods',
+    'libreoffice-with-row-col-spans-repeated.ods',
+])
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+def test_target_engine(fixture, chunk_size):
+    with open(f'fixtures/{fixture}', 'rb') as f:
+        ods_bytes = f.read()
+
+    assert [
+        (sheet_name, list(rows))
+        for sheet_name, rows in stream_read_ods((ods_bytes,), chunk_size=chunk_size, engine='target')
+    ] == [
+        (sheet_name, list(rows))
+        for sheet_name, rows in stream_read_ods((ods_bytes,))
+    ]
+
+
+def test_target_engine_errors():
+    def unzipped_files(content_xml):
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (content_xml,)
+
+    with pytest.raises(InvalidContentXMLError):
+        next(stream_read_ods(stream_zip(unzipped_files(b'Not XML')), engine='target'))
+
+    with pytest.raises(InvalidContentXMLError):
+        next(stream_read_ods(stream_zip(unzipped_files(b'<t>' * 1000 + b'</t>' * 1000)), engine='target'))
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods(stream_zip(unzipped_files(b'Not XML')), engine='sax'))
+
+
+def test_scan_ods():
+    assert list(scan_ods(read_fixture_chunks('excel.ods'))) == [
+        SheetScan('First', 1048576, 2, 11, 0, True),
+        SheetScan('Second', 1048576, 0, 0, 0, True),
+    ]
+    assert list(scan_ods(read_fixture_chunks('libreoffice-with-row-col-spans-repeated.ods'))) == [
+        SheetScan('Sheet1', 3, 3, 7, 3, True),
+    ]
+    assert list(scan_ods(read_fixture_chunks('excel.ods'), sheets=('Second',))) == [
+        SheetScan('Second', 1048576, 0, 0, 0, True),
+    ]
+
+
+def test_scan_ods_skips_values():
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1">'
+            b'<table:table-row table:number-rows-repeated="2"><table:table-cell office:value-type="float" office:value="Not a float"/></table:table-row>'
+            b'<table:table-row><table:table-cell table:number-columns-repeated="3"/><table:table-cell office:value-type="string" table:number-columns-spanned="2" table:number-rows-spanned="2"/></table:table-row>'
+            b'<table:table-row table:number-rows-repeated="10"/>'
+            b'</table:table>'
+            b'</office:document-content>',
+        )
+
+    with pytest.raises(InvalidFloatValueError):
+        next(next(stream_read_ods(stream_zip(unzipped_files())))[1])
+
+    assert list(scan_ods(stream_zip(unzipped_files()))) == [
+        SheetScan('Sheet1', 13, 4, 5, 1, True),
+    ]
+
+
+def test_scan_ods_max_bytes():
+    def get_sheets():
+        yield 'Sheet 1', ('col_1',), ((f'Value {i}',) for i in range(0, 10000))
+        yield 'Sheet 2', ('col_1',), ((f'Value {i}',) for i in range(0, 10000))
+
+    ods_bytes = b''.join(stream_write_ods(get_sheets()))
+    num_chunks = 0
+
+    def get_ods_chunks():
+        nonlocal num_chunks
+        for i in range(0, len(ods_bytes), 100):
+            num_chunks += 1
+            yield ods_bytes[i:i + 100]
+
+    sheet_scans = list(scan_ods(get_ods_chunks(), max_bytes=10000))
+    assert num_chunks == 100
+    assert len(sheet_scans) == 1
+    assert sheet_scans[0].name == 'Sheet 1'
+    assert 0 < sheet_scans[0].num_rows < 10000
+    assert sheet_scans[0].num_rows == sheet_scans[0].num_non_empty_rows
+    assert not sheet_scans[0].complete
+
+    assert list(scan_ods(get_ods_chunks(), max_bytes=len(ods_bytes))) == [
+        SheetScan('Sheet 1', 10001, 10001, 1, 0, True),
+        SheetScan('Sheet 2', 10001, 10001, 1, 0, True),
+    ]
+
+
+def test_conversion_cache(tmp_path):
+    cache = ConversionCache(str(tmp_path))
+
+    def read(fixture, **kwargs):
+        return [
+            (sheet_name, [tuple((type(value), value) for value in row) for row in rows])
+            for sheet_name, rows in stream_read_ods(read_fixture_chunks(fixture), conversion_cache=cache, **kwargs)
+        ]
+
+    expected = [
+        (sheet_name, [tuple((type(value), value) for value in row) for row in rows])
+        for sheet_name, rows in stream_read_ods(read_fixture_chunks('libreoffice.ods'))
+    ]
+    assert (Currency, Currency('2.34', code='GBP')) in expected[0][1][1]
+
+    assert read('libreoffice.ods') == expected
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert read('libreoffice.ods') == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(list(tmp_path.glob('*.rows'))) == 1
+
+    # Arguments that change the rows are part of the key
+    assert read('libreoffice.ods', numeric='float') != expected
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert read('excel.ods', sheets=['Second']) == [('Second', [()])]
+    assert read('excel.ods', sheets=['Second']) == [('Second', [()])]
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert len(list(tmp_path.glob('*'))) == 3
+
+    # The order of sheets isn't part of the key, since for a set it depends on the hash seed
+    expected_both = read('excel.ods')
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert read('excel.ods', sheets=['First', 'Second', 1]) == expected_both
+    assert read('excel.ods', sheets=[1, 'Second', 'First']) == expected_both
+    assert read('excel.ods', sheets={'Second', 1, 'First'}) == expected_both
+    assert (cache.hits, cache.misses) == (4, 5)
+    for path in tmp_path.glob('*'):
+        path.unlink()
+
+    # Entries are only written if all rows are read
+    sheet_name, rows = next(stream_read_ods(read_fixture_chunks('excel.ods'), conversion_cache=cache))
+    next(rows)
+    rows.close()
+    assert len(list(tmp_path.glob('*'))) == 0
+
+    with pytest.raises(UnfinishedIterationError):
+        for sheet_name, rows in stream_read_ods(read_fixture_chunks('libreoffice.ods'), conversion_cache=cache):
+            pass
+    assert len(list(tmp_path.glob('*'))) == 0
+
+
+def test_conversion_cache_eviction(tmp_path):
+    cache = ConversionCache(str(tmp_path), max_size=0)
+
+    def read(fixture, **kwargs):
+        for sheet_name, rows in stream_read_ods(read_fixture_chunks(fixture), conversion_cache=cache, **kwargs):
+            list(rows)
+        return max(tmp_path.glob('*.rows'), key=lambda path: path.stat().st_mtime, default=None)
+
+    assert read('libreoffice.ods') is None
+
+    cache.max_size = 1000000
+    path_a = read('libreoffice.ods')
+    path_b = read('excel.ods')
+    os.utime(path_a, (1, 1))
+    os.utime(path_b, (2, 2))
+
+    # Reading an entry makes it the most recently used
+    read('libreoffice.ods')
+    assert path_a.stat().st_mtime > path_b.stat().st_mtime
+
+    cache.max_size = path_a.stat().st_size + path_b.stat().st_size - 1
+    path_c = read('excel.ods', sheets=['Second'])
+    assert sorted(tmp_path.glob('*')) == sorted([path_a, path_c])
+
+
+@pytest.mark.parametrize('prefetch_bytes', [1, 1000, 1000000])
+def test_prefetch(prefetch_bytes):
+    for fixture in ('excel.ods', 'libreoffice-with-row-col-spans-repeated.ods'):
+        assert [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(read_fixture_chunks(fixture), prefetch_bytes=prefetch_bytes)
+        ] == [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(read_fixture_chunks(fixture))
+        ]
+
+
+def test_prefetch_errors_and_early_exit():
+    num_threads = threading.active_count()
+
+    with pytest.raises(UnzipError) as exc_info:
+        next(stream_read_ods((b'Not a zip' * 1000,), prefetch_bytes=1000))
+    assert isinstance(exc_info.value.__cause__, UnexpectedSignatureError)
+
+    class SourceError(Exception):
+        pass
+
+    def get_ods_chunks():
+        yield from islice(read_fixture_chunks('excel.ods'), 0, 10)
+        raise SourceError()
+
+    with pytest.raises(SourceError):
+        next(stream_read_ods(get_ods_chunks(), prefetch_bytes=1000))
+
+    closed = False
+
+    def get_all_ods_chunks():
+        nonlocal closed
+        try:
+            yield from read_fixture_chunks('excel.ods')
+        finally:
+            closed = True
+
+    sheets_and_rows = stream_read_ods(get_all_ods_chunks(), prefetch_bytes=1000)
+    sheet_name, rows = next(sheets_and_rows)
+    next(rows)
+
+    # As without prefetch_bytes, the source is closed once nothing references the rows
+    sheets_and_rows.close()
+    del rows
+    assert closed
+    assert threading.active_count() == num_threads
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods(read_fixture_chunks('excel.ods'), prefetch_bytes=1000, stats=Stats()))
+
+
+def test_lazy(tmp_path):
+    for fixture in ('excel.ods', 'libreoffice.ods', 'libreoffice-with-row-col-spans-repeated.ods'):
+        lazy_sheets = [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(read_fixture_chunks(fixture), lazy=True)
+        ]
+        assert all(isinstance(row, LazyRow) for _, rows in lazy_sheets for row in rows)
+        assert lazy_sheets == [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(read_fixture_chunks(fixture))
+        ]
+
+    sheet_name, rows = next(stream_read_ods(read_fixture_chunks('libreoffice.ods'), lazy=True))
+    header_row = next(rows)
+    row = next(rows)
+    assert len(row) == 10
+    assert row[7] == Currency('2.34', code='GBP')
+    assert row[-1] == row[9] == '🍰'
+    assert row[1:3] == tuple(row)[1:3]
+    assert hash(header_row) == hash(tuple(header_row))
+    assert pickle.loads(pickle.dumps(row)) == tuple(row)
+    with pytest.raises(IndexError):
+        row[10]
+
+    sheet_name, rows = next(stream_read_ods(read_fixture_chunks('libreoffice.ods'), lazy=True, usecols=(header_row[7],)))
+    columns, rows = simple_table(rows)
+    assert list(rows) == [(Currency('2.34', code='GBP'),)]
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods(read_fixture_chunks('libreoffice.ods'), lazy=True, column_runs=True))
+
+    with pytest.raises(ValueError):
+        stream_read_ods(read_fixture_chunks('libreoffice.ods'), lazy=True, conversion_cache=ConversionCache(str(tmp_path)))
+
+
+def test_lazy_wide_row():
+    num_columns = 65536
+
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row>',
+        ) + (b'<table:table-cell office:value-type="float" office:value="1.5"/>',) * num_columns + (
+            b'</table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+
+    sheet_name, rows = next(stream_read_ods(stream_zip(unzipped_files()), lazy=True))
+    row = next(rows)
+    assert all(row[i] == 1.5 for i in range(num_columns))
+    assert tuple(row) == (1.5,) * num_columns
+
+
+def test_lazy_invalid_value():
+    def unzipped_files():
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row>'
+            b'<table:table-cell office:value-type="string"><text:p>A</text:p></table:table-cell>'
+            b'<table:table-cell office:value-type="float" office:value="Not a float"/>'
+            b'</table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+
+    sheet_name, rows = next(stream_read_ods(stream_zip(unzipped_files()), lazy=True))
+    row = next(rows)
+    assert row[0] == 'A'
+    with pytest.raises(InvalidFloatValueError):
+        row[1]
+    with pytest.raises(InvalidFloatValueError):
+        tuple(row)
+
+
+@pytest.mark.parametrize('engine', ['tree', 'target'])
+def test_string_entity_fragments(engine):
+    def unzipped_files(num_entities):
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row>'
+            b'<table:table-cell office:value-type="string"><text:p>' + b'a&amp;' * num_entities + b'</text:p></table:table-cell>'
+            b'<table:table-cell office:value-type="string"><text:p>Next</text:p></table:table-cell>'
+            b'</table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+
+    def read(num_entities, **kwargs):
+        return [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(stream_zip(unzipped_files(num_entities)), engine=engine, **kwargs)
+        ]
+
+    assert read(30000) == [('Sheet1', [('a&' * 30000, 'Next')])]
+    assert read(200000, string_overflow='truncate') == [('Sheet1', [(('a&' * 200000)[:65536], 'Next')])]
+
+    start = time.perf_counter()
+    with pytest.raises(StringTooLongError):
+        read(200000)
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.parametrize('engine', ['tree', 'target'])
+def test_string_fragments_and_truncate(engine):
+    def unzipped_files(num_spans):
+        modified_at = datetime.now()
+        perms = 0o600
+        yield 'mimetype', modified_at, perms, NO_COMPRESSION_32, (b'application/vnd.oasis.opendocument.spreadsheet',)
+        yield 'content.xml', modified_at, perms, ZIP_32, (
+            b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+            b'<table:table table:name="Sheet1"><table:table-row>'
+            b'<table:table-cell office:value-type="string"><text:p>Start '
+            + b'<text:span>a<text:s/>b</text:span>c' * num_spans +
+            b'</text:p><text:p>End</text:p></table:table-cell>'
+            b'<table:table-cell office:value-type="string"><text:p>Next</text:p></table:table-cell>'
+            b'</table:table-row></table:table>'
+            b'</office:document-content>',
+        )
+
+    def read(num_spans, **kwargs):
+        return [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(stream_zip(unzipped_files(num_spans)), chunk_size=100, engine=engine, **kwargs)
+        ]
+
+    assert read(30000, max_string_length=1000000) == [('Sheet1', [('Start ' + 'abc' * 30000 + '\nEnd', 'Next')])]
+
+    with pytest.raises(StringTooLongError):
+        read(30000)
+
+    assert read(30000, string_overflow='truncate') == [('Sheet1', [(('Start ' + 'abc' * 30000)[:65536], 'Next')])]
+    assert read(2, max_string_length=14, string_overflow='truncate') == [('Sheet1', [('Start abcabc\nE', 'Next')])]
+
+    with pytest.raises(ValueError):
+        read(1, string_overflow='ignore')
+
+
+@pytest.mark.parametrize('spool_max_memory', [0, 16777216])
+def test_spool(spool_max_memory):
+    def sheets():
+        for s in range(0, 3):
+            yield f'Sheet {s}', ('A', 'B'), ((f'{s}-{i}', i) for i in range(0, 3000))
+
+    def expected(s):
+        return [('A', 'B')] + [(f'{s}-{i}', Decimal(i)) for i in range(0, 3000)]
+
+    # Out of order
+    sheets_and_rows = list(stream_read_ods(stream_write_ods(sheets()), spool=True, spool_max_memory=spool_max_memory))
+    assert [sheet_name for sheet_name, rows in sheets_and_rows] == ['Sheet 0', 'Sheet 1', 'Sheet 2']
+    for s in (2, 0, 1):
+        assert list(sheets_and_rows[s][1]) == expected(s)
+
+    # Partially iterated before the next sheet is requested
+    sheets_and_rows = stream_read_ods(stream_write_ods(sheets()), spool=True, spool_max_memory=spool_max_memory)
+    sheet_name_0, rows_0 = next(sheets_and_rows)
+    first_rows_0 = list(islice(rows_0, 10))
+    sheet_name_1, rows_1 = next(sheets_and_rows)
+    assert list(rows_1) == expected(1)
+    assert first_rows_0 + list(rows_0) == expected(0)
+    sheet_name_2, rows_2 = next(sheets_and_rows)
+    assert list(rows_2) == expected(2)
+
+    # Concurrently
+    results = {}
+
+    def read(sheet_name, rows):
+        results[sheet_name] = list(rows)
+
+    threads = [
+        threading.Thread(target=read, args=(sheet_name, rows))
+        for sheet_name, rows in stream_read_ods(stream_write_ods(sheets()), spool=True, spool_max_memory=spool_max_memory)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {f'Sheet {s}': expected(s) for s in range(0, 3)}
+
+    # Concurrently, each started as soon as its sheet is yielded
+    results = {}
+    threads = []
+    for sheet_name, rows in stream_read_ods(stream_write_ods(sheets()), spool=True, spool_max_memory=spool_max_memory):
+        thread = threading.Thread(target=read, args=(sheet_name, rows))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    assert results == {f'Sheet {s}': expected(s) for s in range(0, 3)}
+
+
+def test_spool_closed_and_limits(tmp_path):
+    def sheets():
+        for s in range(0, 2):
+            yield f'Sheet {s}', ('A', 'B'), ((f'{s}-{i}', i) for i in range(0, 3000))
+
+    sheets_and_rows = stream_read_ods(stream_write_ods(sheets()), spool=True)
+    sheet_name_0, rows_0 = next(sheets_and_rows)
+    next(rows_0)
+    rows_0.close()
+    sheet_name_1, rows_1 = next(sheets_and_rows)
+    assert len(list(rows_1)) == 3001
+    assert list(rows_0) == []
+
+    with pytest.raises(SpoolTooLargeError):
+        list(stream_read_ods(stream_write_ods(sheets()), spool=True, spool_max_memory=0, spool_max_disk=1000))
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods(stream_write_ods(sheets()), spool=True, conversion_cache=ConversionCache(str(tmp_path))))
+
+    with pytest.raises(ValueError):
+        next(stream_read_ods(stream_write_ods(sheets()), spool=True, lazy=True))
+
+
+def test_intern_strings():
+    def sheets():
+        for s in range(0, 2):
+            yield f'Sheet {s}', ('Country', 'Status'), ((['UK', 'France', 'Spain'][i % 3], ['Open', 'Closed'][i % 2]) for i in range(0, 100))
+
+    def read(**kwargs):
+        return [
+            (sheet_name, list(rows))
+            for sheet_name, rows in stream_read_ods(stream_write_ods(sheets()), **kwargs)
+        ]
+
+    not_interned = read()
+    interned = read(intern_strings=7)
+    assert interned == not_interned
+
+    for sheet_name, rows in interned:
+        assert len({id(cell) for row in rows for cell in row}) == 7
+    assert len({id(cell) for row in read(intern_strings=4)[0][1] for cell in row}) > 7
+    assert interned[0][1][1][0] is not interned[1][1][1][0]
+    assert len({id(row[0]) for row in not_interned[0][1][1:]}) > 3
+
+
+def test_columnar_dictionary_encode():
+    pa = pytest.importorskip('pyarrow')
+
+    def get_sheets():
+        yield 'Sheet 1', ('Country', 'Number'), (('UK', 1), ('France', 2), (None, 3), ('UK', 4))
+
+    (name, batches), = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=3, batch_format='numpy', dictionary_encode=True)
+    ]
+    assert isinstance(batches[0][0], DictionaryColumn)
+    assert batches[0][0].codes.tolist() == [0, 1, 2]
+    assert batches[0][0].dictionary.tolist() == ['Country', 'UK', 'France']
+    assert batches[1][0].codes.tolist() == [None, 0]
+    assert batches[1][0].dictionary.tolist() == ['UK']
+    assert batches[1][1].tolist() == [3.0, 4.0]
+
+    (name, batches), = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=3, batch_format='arrow', dictionary_encode=True)
+    ]
+    assert [batch.schema.types[0] for batch in batches] == [pa.dictionary(pa.int32(), pa.string())] * 2
+    assert pa.Table.from_batches(batches).column('0').to_pylist() == ['Country', 'UK', 'France', None, 'UK']
+
+    # More distinct strings in the first batch than max_dictionary_size
+    (name, batches), = [
+        (name, list(batches))
+        for name, batches in stream_read_ods_columnar(stream_write_ods(get_sheets()), batch_size=3, batch_format='arrow', dictionary_encode=True, max_dictionary_size=2)
+    ]
+    assert [batch.schema.types[0] for batch in batches] == [pa.string()] * 2
+    assert [batch.to_pydict()['0'] for batch in batches] == [['Country', 'UK', 'France'], [None, 'UK']]